@@ -0,0 +1,103 @@
+import os
+import time
+import hashlib
+import sqlite3
+import threading
+from contextlib import closing
+from concurrent.futures import Future
+from tracing import tracer
+
+# ---------------------------------------------------------
+# AI 분석 (Gemini)
+# ---------------------------------------------------------
+
+NO_AI = "AI 분석 미사용"
+AI_FAILED = "AI 호출 실패"
+AI_CACHE_PATH = os.environ.get("AI_CACHE_PATH", ".ai_cache.db")
+
+# generate(prompt) -> str 인터페이스만 맞추면 테스트용 가짜 클라이언트로 교체 가능
+# google.generativeai 는 첫 호출 때 import 하고 API 키 설정도 그때 한 번만 수행
+class GeminiClient:
+    def __init__(self, model="gemini-pro", api_key=None):
+        self.model = model
+        self.api_key = api_key
+        self._model = None
+        self._lock = threading.Lock()
+
+    def _get_model(self):
+        with self._lock:
+            if self._model is None:
+                import google.generativeai as genai
+                if self.api_key: genai.configure(api_key=self.api_key)
+                self._model = genai.GenerativeModel(self.model)
+            return self._model
+
+    @tracer.traced("gemini.generate")
+    def generate(self, prompt):
+        return self._get_model().generate_content(prompt).text
+
+def analysis_prompt(res, yrs):
+    return f"""종목:{res['iq']}, 기간:{yrs}년, 원금:{res['inv']:,.0f}, 최종:{res['val']:,.0f}, 수익률:{res['prof']:.2f}%, MDD:{res['mdd']:.2f}%. 분석요약."""
+
+# 공백을 정규화한 프롬프트와 모델 이름의 해시
+def prompt_key(model, prompt):
+    return hashlib.sha256(f"{model}\n{' '.join(prompt.split())}".encode()).hexdigest()
+
+# 같은 모델/프롬프트의 응답은 SQLite 캐시에서 돌려주고, 동시에 들어온 같은 요청은 한 번만 호출
+# 오래된 항목(ttl)과 max_entries 를 넘는 가장 오래 안 쓰인 항목은 저장할 때 정리
+class CachedAIClient:
+    def __init__(self, client, path=AI_CACHE_PATH, ttl=7 * 86400, max_entries=5000):
+        self.client = client
+        self.model = getattr(client, "model", "")
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._inflight = {}
+        self._lock = threading.Lock()
+        with closing(self._connect()) as c, c:
+            c.execute("CREATE TABLE IF NOT EXISTS ai_cache (key TEXT PRIMARY KEY, model TEXT, text TEXT, created_at REAL, used_at REAL)")
+            c.execute("CREATE INDEX IF NOT EXISTS ai_cache_used ON ai_cache (used_at)")
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=10)
+
+    def _read(self, key):
+        now = time.time()
+        with closing(self._connect()) as c, c:
+            row = c.execute("SELECT text FROM ai_cache WHERE key = ? AND created_at > ?", (key, now - self.ttl)).fetchone()
+            if row: c.execute("UPDATE ai_cache SET used_at = ? WHERE key = ?", (now, key))
+        return row[0] if row else None
+
+    def _write(self, key, text):
+        now = time.time()
+        with closing(self._connect()) as c, c:
+            c.execute("INSERT OR REPLACE INTO ai_cache VALUES (?, ?, ?, ?, ?)", (key, self.model, text, now, now))
+            c.execute("DELETE FROM ai_cache WHERE created_at <= ?", (now - self.ttl,))
+            c.execute("DELETE FROM ai_cache WHERE key NOT IN (SELECT key FROM ai_cache ORDER BY used_at DESC LIMIT ?)", (self.max_entries,))
+
+    @tracer.cached("ai_cache")
+    def generate(self, prompt):
+        key = prompt_key(self.model, prompt)
+        text = self._read(key)
+        if text is not None: return text
+
+        with self._lock:
+            fut = self._inflight.get(key)
+            owner = fut is None
+            if owner: fut = self._inflight[key] = Future()
+        if not owner: return fut.result()
+
+        try:
+            # 잠금을 기다리는 사이 다른 요청이 저장했을 수 있으므로 한 번 더 확인
+            text = self._read(key)
+            if text is None:
+                tracer.miss()
+                text = self.client.generate(prompt)
+                self._write(key, text)
+            fut.set_result(text)
+            return text
+        except Exception as e:
+            fut.set_exception(e)
+            raise
+        finally:
+            with self._lock: self._inflight.pop(key, None)
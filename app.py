@@ -1,20 +1,20 @@
 import streamlit as st
-import yfinance as yf
 import pandas as pd
-import matplotlib.pyplot as plt
-import matplotlib.dates as mdates
-import matplotlib.font_manager as fm
-import google.generativeai as genai
-from fpdf import FPDF
-import os
+import threading
 from streamlit_oauth import OAuth2Component
-import gspread
-from oauth2client.service_account import ServiceAccountCredentials
 import time
-import urllib.request
-from scipy import optimize
 from io import BytesIO
 import numpy as np
+from sheets_repo import SheetRepo
+from holdings import HoldingsBook, holdings_table, aggregate
+from trade_queue import TradeQueue
+from quotes import QuoteService
+from render_cache import LRUCache, result_key
+from jobs import JobRunner, simulation_job
+from ai import GeminiClient, CachedAIClient, NO_AI
+from price_store import PriceStore, FX_TICKER
+from tracing import tracer, format_trace
+from simulation import buy_schedule, per_buy_amount, sweep_grid, run_sweep, rolling_backtest, align_fx, is_us_ticker, WEEKDAYS, MONTH_DATES, FX_FALLBACK, REBALANCE
 
 # ---------------------------------------------------------
 # 1. 앱 설정
@@ -26,88 +26,22 @@ CLIENT_ID = st.secrets.get("GOOGLE_CLIENT_ID")
 CLIENT_SECRET = st.secrets.get("GOOGLE_CLIENT_SECRET")
 REDIRECT_URI = st.secrets.get("REDIRECT_URI")
 
+# 관리자 이메일: 리스트 또는 쉼표로 구분한 문자열 (대소문자 무시, 정확히 일치할 때만)
+def parse_emails(v):
+    if isinstance(v, str): v = v.split(",")
+    return {str(e).strip().lower() for e in v or [] if str(e).strip()}
+
+ADMIN_EMAILS = parse_emails(st.secrets.get("ADMIN_EMAILS", []))
+
 AUTHORIZE_URL = "https://accounts.google.com/o/oauth2/v2/auth"
 TOKEN_URL = "https://oauth2.googleapis.com/token"
 REVOKE_TOKEN_URL = "https://oauth2.googleapis.com/revoke"
 SCOPE = "openid email profile"
 
-if GEMINI_API_KEY:
-    genai.configure(api_key=GEMINI_API_KEY)
-
 # ---------------------------------------------------------
 # 2. 헬퍼 함수 (차트, 계산, PDF 등)
 # ---------------------------------------------------------
 
-# 폰트 설정
-def set_korean_font():
-    font_path = "NanumGothic-Regular.ttf"
-    if not os.path.exists(font_path):
-        urllib.request.urlretrieve("https://github.com/Dealstreet/stock-dca-app/raw/refs/heads/main/NanumGothic-Regular.ttf", font_path)
-    font_prop = fm.FontProperties(fname=font_path)
-    plt.rcParams['font.family'] = font_prop.get_name()
-    plt.rcParams['axes.unicode_minus'] = False
-    return font_prop
-
-# MDD 계산
-def calculate_mdd(prices):
-    roll_max = prices.cummax()
-    drawdown = prices / roll_max - 1.0
-    mdd = drawdown.min()
-    return mdd * 100
-
-# 차트 생성 (26, 52, 78... 회차 마킹)
-def create_chart(df_history, ticker_name, unit_divider=1, unit_label="원"):
-    font_prop = set_korean_font()
-    fig, ax = plt.subplots(figsize=(12, 7))
-    
-    dates = df_history['date']
-    val_series = df_history['total_value'] / unit_divider
-    inv_series = df_history['invested'] / unit_divider
-    inf_series = df_history['inflation_principal'] / unit_divider
-    
-    # 메인 라인
-    ax.plot(dates, val_series, label='포트폴리오 가치', color='#FF5733', linewidth=2)
-    ax.plot(dates, inv_series, label='총 투자원금', color='#333333', linestyle='--', linewidth=1.5)
-    ax.plot(dates, inf_series, label='물가상승원금선 (연2%)', color='#2E86C1', linestyle=':', linewidth=1.5)
-    
-    # 마커 및 텍스트 표시 (26회차, 52회차, 78회차...)
-    # index 25가 26회차입니다.
-    start_idx = 25 
-    interval = 26
-    
-    for i in range(start_idx, len(dates), interval):
-        date_val = dates.iloc[i]
-        price_val = val_series.iloc[i]
-        
-        # 마커
-        ax.plot(date_val, price_val, marker='o', color='#C70039', markersize=6)
-        
-        # 텍스트 라벨 (회차 및 금액)
-        label_text = f"{i+1}회차\n{price_val:,.0f}{unit_label}"
-        ax.annotate(label_text, 
-                    xy=(date_val, price_val), 
-                    xytext=(0, 15), textcoords='offset points',
-                    ha='center', fontsize=8, fontproperties=font_prop,
-                    bbox=dict(boxstyle="round,pad=0.3", fc="white", ec="gray", alpha=0.8))
-
-    ax.set_title(f"[{ticker_name}] DCA 투자 성과 추이", fontproperties=font_prop, fontsize=16)
-    ax.set_xlabel("기간 (월)", fontproperties=font_prop)
-    ax.set_ylabel(f"평가 금액 ({unit_label})", fontproperties=font_prop)
-    
-    ax.xaxis.set_major_locator(mdates.MonthLocator(interval=max(1, len(dates)//10)))
-    ax.xaxis.set_major_formatter(mdates.DateFormatter('%Y-%m'))
-    plt.xticks(rotation=45)
-    
-    ax.legend(prop=font_prop)
-    ax.grid(True, linestyle='--', alpha=0.5)
-    plt.tight_layout()
-    
-    buf = BytesIO()
-    plt.savefig(buf, format="png", dpi=100)
-    buf.seek(0)
-    plt.close(fig)
-    return buf
-
 # DB 및 기타 유틸리티
 @st.cache_resource
 def init_connection():
@@ -115,124 +49,186 @@ def init_connection():
     creds_dict = dict(st.secrets["gcp_service_account"])
     if "private_key" in creds_dict:
         creds_dict["private_key"] = creds_dict["private_key"].replace("\\n", "\n").strip()
+    import gspread
+    from oauth2client.service_account import ServiceAccountCredentials
     creds = ServiceAccountCredentials.from_json_keyfile_dict(creds_dict, scope)
     return gspread.authorize(creds)
 
-def get_sheet(sheet_name):
-    client = init_connection()
-    try: return client.open("portfolio_db").worksheet(sheet_name)
-    except: return client.open("portfolio_db").add_worksheet(title=sheet_name, rows=100, cols=10)
+@st.cache_resource
+def get_repo():
+    return SheetRepo(lambda: init_connection().open("portfolio_db"))
 
+@tracer.traced("sheets.get_user_info")
 def get_user_info(email):
     try:
-        sheet = get_sheet("user_settings")
-        df = pd.DataFrame(sheet.get_all_records())
-        if not df.empty and email in df['email'].values:
-            u = df[df['email'] == email].iloc[0]
-            return {"nickname": u['nickname'], "name": u['name'], "default_budget": int(str(u['default_budget']).replace(',', ''))}
-    except: pass
+        u = get_repo().get_user(email)
+        if u: return {"nickname": u['nickname'], "name": u['name'], "default_budget": int(str(u['default_budget']).replace(',', ''))}
+    except Exception as e: tracer.fail("get_user_info", e)
     return {"nickname": "투자자", "name": "", "default_budget": 1000000}
 
+@tracer.traced("sheets.update_user_info")
 def update_user_info(email, nick, name, bud):
     try:
-        sheet = get_sheet("user_settings")
-        df = pd.DataFrame(sheet.get_all_records())
-        if not df.empty and email in df['email'].values:
-            r = sheet.find(email).row
-            sheet.update_cell(r, 2, nick); sheet.update_cell(r, 3, name); sheet.update_cell(r, 4, bud)
-        else:
-            if not sheet.get_all_values(): sheet.append_row(["email", "nickname", "name", "default_budget"])
-            sheet.append_row([email, nick, name, bud])
+        get_repo().upsert_user(email, nick, name, bud)
         return True
-    except: return False
+    except Exception as e:
+        tracer.fail("update_user_info", e)
+        return False
+
+# 거래 입력은 로컬 큐에 바로 기록되고 백그라운드에서 시트로 일괄 전송
+# 전송이 실패한 뒤에는 시트를 다시 읽어 이미 기록된 trade_id 는 재전송하지 않음
+@st.cache_resource
+def get_trade_queue():
+    return TradeQueue(flush_trades, sent_trades).start()
+
+def flush_trades(rows):
+    with tracer.span("sheets.add_trades", rows=len(rows)): get_repo().add_trades(rows)
+
+def sent_trades(ids):
+    with tracer.span("sheets.sent_trades", rows=len(ids)): return get_repo().sent_trade_ids(ids, reload=True)
 
 def add_trade(email, t, d, p, q):
-    try:
-        s = get_sheet("sheet1")
-        if not s.get_all_values(): s.append_row(["user_email", "ticker", "date", "price", "quantity"])
-        s.append_row([email, t, str(d), p, int(q)])
-    except: pass
+    get_trade_queue().enqueue(email, t, d, p, q)
 
-def get_portfolio_df(email):
-    try:
-        s = get_sheet("sheet1")
-        df = pd.DataFrame(s.get_all_records())
-        if not df.empty:
-            df['price'] = pd.to_numeric(df['price'], errors='coerce')
-            df['quantity'] = pd.to_numeric(df['quantity'], errors='coerce')
-            return df[df['user_email'] == email]
-    except: pass
-    return pd.DataFrame()
+# 사용자별 보유 현황 스냅샷은 새로 추가된 거래 행만 반영해 갱신
+@st.cache_resource
+def get_holdings_book():
+    return HoldingsBook(get_repo())
+
+# 시트에 아직 반영되지 않은 거래도 함께 합산 (보유 현황 표, 반영 대기 건수)
+@tracer.traced("sheets.get_holdings")
+def get_holdings(email):
+    try: pend = get_trade_queue().pending_df(email)
+    except Exception as e: tracer.fail("trade_queue.pending", e); pend = None
+    n_pend = 0 if pend is None else len(pend)
+    try: return get_holdings_book().holdings(email, pend), n_pend
+    except Exception as e:
+        tracer.fail("sheets.trades", e)
+        return holdings_table(aggregate(pend)), n_pend
+
+# 현재가는 모든 세션이 공유하는 짧은 TTL 캐시에서 조회
+@st.cache_resource
+def get_quote_service():
+    return QuoteService(ttl=60)
 
+@tracer.cached("load_fx")
 @st.cache_data(ttl=3600)
-def get_exchange_rate():
+def load_fx():
+    tracer.miss()
     try:
-        df = yf.download("KRW=X", period="1d", progress=False)
-        return float(df['Close'].iloc[-1])
-    except: return 1400.0
+        with tracer.span("price_store.load", ticker=FX_TICKER): d = get_price_store().load(FX_TICKER)
+        if d is not None and not d.empty: return d['Close']
+    except Exception as e: tracer.fail("load_fx", e)
+    return None
+
+@tracer.traced("get_exchange_rate")
+def get_exchange_rate():
+    fx = load_fx()
+    if fx is None or fx.dropna().empty: return FX_FALLBACK
+    return float(fx.dropna().iloc[-1])
 
 def get_ticker(q):
     q = q.strip()
     m = {"삼성전자": "005930.KS", "SK하이닉스": "000660.KS", "현대차": "005380.KS", "애플": "AAPL", "테슬라": "TSLA", "엔비디아": "NVDA", "마이크로소프트": "MSFT", "비트코인": "BTC-USD", "나스닥100": "QQQ", "S&P500": "SPY", "슈드": "SCHD"}
     return m.get(q, f"{q}.KS" if q.isdigit() and len(q)==6 else q)
 
+# "종목:비중, 종목:비중" 입력을 (이름, 티커, 비중) 목록으로 변환 (비중 합계 1, 같은 티커는 합산)
+def parse_weights(text):
+    items = {}
+    for part in text.split(","):
+        name, _, w = part.partition(":")
+        if not name.strip(): continue
+        try: w = float(w.replace("%", "")) if w.strip() else 1.0
+        except ValueError: continue
+        if w <= 0: continue
+        t = get_ticker(name)
+        n, w0 = items.get(t, (name.strip(), 0.0))
+        items[t] = (n, w0 + w)
+    total = sum(w for _, w in items.values())
+    return [(n, t, w / total) for t, (n, w) in items.items()]
+
+@st.cache_resource
+def get_price_store():
+    return PriceStore()
+
+@tracer.cached("load_data")
 @st.cache_data(ttl=3600)
 def load_data(t):
+    tracer.miss()
     try:
-        d = yf.Ticker(t).history(period="max")
-        if not d.empty: d.index = d.index.tz_localize(None); return d
-    except: pass
+        with tracer.span("price_store.load", ticker=t): d = get_price_store().load(t)
+        if d is not None and not d.empty: return d
+    except Exception as e: tracer.fail("load_data", e)
     return None
 
-def xirr(cf, d):
-    if len(cf) != len(d): return None
-    def npv(r):
-        if r <= -1.0: return float('inf')
-        d0 = d[0]; return sum([c / ((1 + r) ** ((dt - d0).days / 365.0)) for c, dt in zip(cf, d)])
-    try: return optimize.newton(npv, 0.1)
-    except: return None
-
 def format_currency(v, u="원"):
     if u == "만원": return f"{v/10000:,.0f}만원"
     elif u == "백만원": return f"{v/1000000:,.2f}백만원"
     elif u == "억원": return f"{v/100000000:,.4f}억원"
     return f"{v:,.0f}원"
 
+def format_percent(v, p=2): return f"{v:.{p}f}%" if v == v else "-"
+
 def format_number(n): return "{:,}".format(int(n)) if n else "0"
 
-def create_pdf(ticker, ai_txt, prof, xirr_v, inv, val, exc, chart_buf, mdd):
-    font_urls = {"NanumGothic-Regular.ttf": "https://github.com/Dealstreet/stock-dca-app/raw/refs/heads/main/NanumGothic-Regular.ttf", "NanumGothic-Bold.ttf": "https://github.com/Dealstreet/stock-dca-app/raw/refs/heads/main/NanumGothic-Bold.ttf"}
-    for f, u in font_urls.items():
-        if not os.path.exists(f): 
-            try: urllib.request.urlretrieve(u, f)
-            except: pass
-            
-    pdf = FPDF()
-    pdf.add_page()
-    hk = os.path.exists("NanumGothic-Regular.ttf")
-    pdf.add_font('Nanum', '', 'NanumGothic-Regular.ttf', uni=True) if hk else None
-    pdf.add_font('Nanum', 'B', 'NanumGothic-Bold.ttf', uni=True) if hk else None
-    pdf.set_font('Nanum' if hk else 'Arial', 'B', 20)
-    
-    pdf.cell(0, 15, txt=f"[{ticker}] Investment Report", ln=True, align='C')
-    pdf.ln(5)
-    
-    pdf.set_font('Nanum' if hk else 'Arial', '', 12)
-    pdf.set_fill_color(240, 240, 240)
-    pdf.cell(0, 10, txt=f" Total Invested: {inv:,.0f} KRW", ln=True, fill=True)
-    pdf.cell(0, 10, txt=f" Final Value: {val:,.0f} KRW", ln=True, fill=True)
-    pdf.cell(0, 10, txt=f" Return: {prof:.2f}% | XIRR: {xirr_v:.2f}% | MDD: {mdd:.2f}%", ln=True, fill=True)
-    pdf.cell(0, 10, txt=f" Excess Return: {exc:,.0f} KRW", ln=True, fill=True)
-    pdf.ln(10)
-    
-    if chart_buf:
-        import tempfile
-        with tempfile.NamedTemporaryFile(delete=False, suffix=".png") as tmp:
-            tmp.write(chart_buf.getvalue()); tmp_path = tmp.name
-        pdf.image(tmp_path, x=10, w=190); os.unlink(tmp_path)
-    pdf.ln(10)
-    pdf.multi_cell(0, 8, txt=ai_txt)
-    return pdf.output(dest='S').encode('latin-1')
+# 같은 결과/단위의 차트 PNG 와 PDF 는 다시 그리지 않음
+@st.cache_resource
+def get_render_cache():
+    return LRUCache(maxsize=32)
+
+@tracer.cached("render_chart")
+def render_chart(res, divider, unit):
+    def make():
+        tracer.miss()
+        from report import create_chart
+        with tracer.span("create_chart"): return create_chart(res['df'], res['iq'], divider, unit, res.get('mask')).getvalue()
+    key = res.setdefault('key', result_key(res))
+    return get_render_cache().get(("chart", key, unit), make)
+
+@tracer.cached("render_pdf")
+def render_pdf(res, divider, unit):
+    def make():
+        tracer.miss()
+        from report import create_pdf
+        with tracer.span("create_pdf"): return create_pdf(res['iq'], res['ai'], res['prof'], res['xv'], res['inv'], res['val'], res['exc'], BytesIO(chart_png), res['mdd'])
+    key = res.setdefault('key', result_key(res))
+    chart_png = render_chart(res, divider, unit)
+    return get_render_cache().get(("pdf", key, unit), make)
+
+# 로그인 후 차트/PDF 모듈과 폰트를 백그라운드에서 미리 불러옴 (프로세스당 한 번)
+@st.cache_resource
+def preload_assets():
+    def load():
+        from report import preload_fonts
+        preload_fonts()
+    t = threading.Thread(target=load, name="preload-assets", daemon=True)
+    t.start()
+    return t
+
+# 시뮬레이션은 백그라운드 작업으로 실행 (데이터/AI 는 스레드, 계산은 프로세스 풀)
+@st.cache_resource
+def get_job_runner():
+    return JobRunner()
+
+# AI 분석 결과는 프롬프트/모델 기준으로 디스크에 캐시하고 세션 간에 공유
+@st.cache_resource
+def get_ai_client():
+    return CachedAIClient(GeminiClient("gemini-pro", api_key=GEMINI_API_KEY)) if GEMINI_API_KEY else None
+
+# 작업 진행 상황을 주기적으로 확인하고, 끝나면 결과를 세션에 넣고 전체 화면 갱신
+@st.fragment(run_every=0.5)
+def poll_sim_job():
+    runner = get_job_runner()
+    job = runner.get(st.session_state.get('sim_job'))
+    if job is not None and job.active:
+        st.progress(job.progress, text=job.stage)
+        return
+    st.session_state.pop('sim_job', None)
+    if job is not None:
+        runner.pop(job.id)
+        if job.status == "done": st.session_state['sim_result'] = job.result
+        else: st.session_state['sim_error'] = str(job.error)
+    st.rerun()
 
 # ---------------------------------------------------------
 # 3. 메인 로직
@@ -266,7 +262,27 @@ def show_landing_page():
         else:
             st.error("Google Client ID/Secret 설정이 필요합니다.")
 
+# 관리자 전용: 추적 켜기/끄기, 최근 실행의 구간 트리와 카운터, 내보내기
+def show_trace_panel():
+    with st.expander("🔧 성능 추적"):
+        tracer.enabled = st.toggle("추적 사용", value=tracer.enabled)
+        traces = list(tracer.history)[::-1]
+        if traces:
+            tr = st.selectbox("실행 기록", traces, format_func=lambda t: f"#{t.id} {t.name} ({t.ms:,.0f} ms)")
+            st.code(format_trace(tr), language=None)
+            if tr.counters:
+                st.dataframe(pd.DataFrame([{"항목": ":".join(k), "횟수": v} for k, v in sorted(tr.counters.items())]), hide_index=True)
+        else: st.caption("기록 없음")
+        totals = {k: list(v) for k, v in tracer.span_totals.items()}
+        if totals:
+            st.dataframe(pd.DataFrame([{"구간": k, "횟수": n, "평균(ms)": sec / n * 1000, "오류": err} for k, (n, sec, err) in sorted(totals.items())]).style.format({"평균(ms)": "{:,.1f}"}), hide_index=True)
+        c1, c2 = st.columns(2)
+        c1.download_button("JSON lines", tracer.to_jsonl, "trace.jsonl", "application/x-ndjson")
+        c2.download_button("Prometheus", tracer.to_prometheus, "metrics.prom", "text/plain")
+        if st.button("기록 초기화"): tracer.reset(); st.rerun()
+
 def show_main_app():
+    preload_assets()
     user_email = st.session_state.get("user_email")
     if "user_info" not in st.session_state: st.session_state["user_info"] = get_user_info(user_email)
     user_info = st.session_state["user_info"]
@@ -276,6 +292,7 @@ def show_main_app():
         menu = st.radio("메뉴", ["📊 시뮬레이션", "⚙️ 정보 수정"])
         if st.button("로그아웃"):
             del st.session_state["token"]; del st.session_state["user_info"]; st.rerun()
+        if (user_email or "").lower() in ADMIN_EMAILS: show_trace_panel()
 
     if menu == "⚙️ 정보 수정":
         st.header("정보 수정")
@@ -285,14 +302,14 @@ def show_main_app():
             b = st.text_input("예산", format_number(user_info.get("default_budget")))
             if st.form_submit_button("저장"):
                 try: cb = int(b.replace(",",""))
-                except: cb = 0
+                except ValueError: cb = 0
                 if update_user_info(user_email, nn, nm, cb):
                     st.session_state["user_info"] = {"nickname": nn, "name": nm, "default_budget": cb}
                     st.success("저장되었습니다."); time.sleep(1); st.rerun()
 
     elif menu == "📊 시뮬레이션":
         st.title("💰 DCA 시뮬레이터")
-        tab1, tab2 = st.tabs(["시뮬레이션", "내 포트폴리오"])
+        tab1, tab2, tab3, tab4 = st.tabs(["시뮬레이션", "내 포트폴리오", "일괄 비교", "시작일 분석"])
         
         with tab1:
             with st.expander("설정", expanded=True):
@@ -300,7 +317,7 @@ def show_main_app():
                 iq = c1.text_input("종목", "삼성전자"); it = get_ticker(iq)
                 bs = c2.text_input("예산", format_number(user_info.get("default_budget")))
                 try: mb = int(bs.replace(",",""))
-                except: mb = 0
+                except ValueError: mb = 0
                 intv = c3.selectbox("주기", ["매월", "매주", "매일"])
                 
                 # 상세 날짜/요일 선택
@@ -312,6 +329,12 @@ def show_main_app():
                     elif intv == "매월":
                         target_date = st.selectbox("매수 날짜", [1, 15, 30], index=0)
 
+                pm = st.checkbox("포트폴리오 모드 (여러 종목)", False)
+                if pm:
+                    p1, p2 = st.columns([2, 1])
+                    pq = p1.text_input("종목:비중", "나스닥100:40, 슈드:30, 삼성전자:30")
+                    rebal = p2.selectbox("리밸런싱", list(REBALANCE), index=2)
+
                 c6, c7, c8 = st.columns(3)
                 yrs = c6.slider("기간(년)", 1, 10, 3)
                 div = c7.checkbox("배당재투자", True)
@@ -320,79 +343,16 @@ def show_main_app():
                 st.caption(f"환율: 1$ = {uk:,.2f}원")
 
             if st.button("🚀 시뮬레이션 시작", type="primary"):
-                raw = load_data(it)
-                if raw is not None:
-                    is_us = False; sym = "₩"
-                    if "Close" in raw.columns:
-                        if not (it.endswith(".KS") or it.endswith(".KQ")): is_us = True; sym = "$"
-                    
-                    df = raw[raw.index >= (raw.index.max() - pd.DateOffset(years=yrs))].copy()
-                    
-                    bi = []
-                    if intv == "매일": bi = df.index
-                    elif intv == "매월":
-                        grouped = df.groupby([df.index.year, df.index.month])
-                        for _, g in grouped:
-                            candidates = g[g.index.day >= target_date]
-                            if not candidates.empty: bi.append(candidates.index[0])
-                            else: bi.append(g.index[-1])
-                    elif intv == "매주":
-                        d_map = {"월요일":0, "화요일":1, "수요일":2, "목요일":3, "금요일":4}
-                        bi = df[df.index.dayofweek == d_map[target_day]].index
-
-                    pt_krw = mb
-                    if intv == "매주": pt_krw = mb * 12 / 52
-                    elif intv == "매일": pt_krw = mb * 12 / 250
-                    
-                    pt_amt = pt_krw / uk if is_us else pt_krw
-                    shares = 0; inv_curr = 0; inf_p = 0
-                    hist = []; xirr_fs = []; prev = df.index[0]
-                    
-                    for d, r in df.iterrows():
-                        p = r['Close']
-                        days = (d - prev).days
-                        if inf_p > 0: inf_p *= (1.02) ** (days/365)
-                        prev = d
-                        
-                        if div and r.get('Dividends', 0) > 0: shares += (r['Dividends']*shares)/p
-                        
-                        if d in bi:
-                            shares += pt_amt/p
-                            inv_curr += pt_amt
-                            inf_p += pt_amt * (uk if is_us else 1)
-                            xirr_fs.append(-pt_krw)
-                        
-                        rate = uk if is_us else 1
-                        hist.append({"date": d, "invested": inv_curr*rate, "total_value": shares*p*rate, "inflation_principal": inf_p})
-                    
-                    res_df = pd.DataFrame(hist)
-                    fin_inv = res_df['invested'].iloc[-1]
-                    fin_val = res_df['total_value'].iloc[-1]
-                    fin_inf = res_df['inflation_principal'].iloc[-1]
-                    
-                    prof = (fin_val - fin_inv) / fin_inv * 100
-                    exc = fin_val - fin_inf
-                    mdd = calculate_mdd(res_df['total_value'])
-                    
-                    x_dates = [d for d in bi if d <= df.index.max()] + [res_df['date'].iloc[-1]]
-                    x_flows = [-pt_krw]*len([d for d in bi if d <= df.index.max()]) + [fin_val]
-                    if len(x_dates) > len(x_flows): x_dates = x_dates[:len(x_flows)]
-                    elif len(x_flows) > len(x_dates): x_flows = x_flows[:len(x_dates)]
-                    
-                    try: xv = xirr(x_flows, x_dates) * 100
-                    except: xv = 0.0
-                    
-                    ai_txt = "AI 분석 미사용"
-                    if ai and GEMINI_API_KEY:
-                        prompt = f"""종목:{iq}, 기간:{yrs}년, 원금:{fin_inv:,.0f}, 최종:{fin_val:,.0f}, 수익률:{prof:.2f}%, MDD:{mdd:.2f}%. 분석요약."""
-                        try: ai_txt = genai.GenerativeModel("gemini-pro").generate_content(prompt).text
-                        except: ai_txt = "AI 호출 실패"
-                    
-                    st.session_state['sim_result'] = {
-                        'df': res_df, 'iq': iq, 'inv': fin_inv, 'val': fin_val, 'prof': prof, 
-                        'exc': exc, 'xv': xv, 'mdd': mdd, 'ai': ai_txt, 'dates': x_dates
-                    }
-                else: st.error("데이터 없음")
+                items = parse_weights(pq) if pm else None
+                if pm and not items:
+                    st.error("종목:비중 형식으로 한 종목 이상 입력하세요 (예: QQQ:60, SCHD:40)")
+                else:
+                    p = {'iq': iq, 'it': it, 'mb': mb, 'intv': intv, 'target_day': target_day, 'target_date': target_date,
+                         'yrs': yrs, 'div': div, 'ai': ai, 'items': items, 'rebal': rebal if pm else None}
+                    st.session_state['sim_job'] = get_job_runner().submit(simulation_job, p, get_price_store(), get_ai_client())
+
+            if 'sim_job' in st.session_state: poll_sim_job()
+            if 'sim_error' in st.session_state: st.error(st.session_state.pop('sim_error'))
 
             if 'sim_result' in st.session_state:
                 res = st.session_state['sim_result']
@@ -406,38 +366,30 @@ def show_main_app():
                 c1, c2, c3, c4 = st.columns(4)
                 c1.metric("총 투자원금", format_currency(res['inv'], u_opt))
                 c2.metric("최종 평가액", format_currency(res['val'], u_opt))
-                c3.metric("수익률 / XIRR", f"{res['prof']:.1f}% / {res['xv']:.1f}%")
+                c3.metric("수익률 / XIRR", f"{res['prof']:.1f}% / {format_percent(res['xv'], 1)}")
                 c4.metric("초과수익[최종 평가액 - 물가상승(2%)]", format_currency(res['exc'], u_opt))
                 
                 st.caption(f"📉 최대 낙폭 (MDD): **{res['mdd']:.2f}%**")
                 
-                chart_buf = create_chart(res['df'], res['iq'], divider, u_opt)
-                st.image(chart_buf, use_container_width=True)
+                chart_png = render_chart(res, divider, u_opt)
+                st.image(chart_png, use_container_width=True)
                 
-                if res['ai'] != "AI 분석 미사용": st.info(res['ai'])
+                if res['ai'] != NO_AI: st.info(res['ai'])
                 
-                pdf_d = create_pdf(res['iq'], res['ai'], res['prof'], res['xv'], res['inv'], res['val'], res['exc'], chart_buf, res['mdd'])
-                st.download_button("📄 PDF 다운로드", pdf_d, f"{res['iq']}_report.pdf", "application/pdf")
+                # PDF 는 다운로드 버튼을 눌렀을 때만 생성
+                st.download_button("📄 PDF 다운로드", lambda: render_pdf(res, divider, u_opt), f"{res['iq']}_report.pdf", "application/pdf")
 
         with tab2:
             st.subheader("내 보유 자산")
-            df_p = get_portfolio_df(user_email)
-            if not df_p.empty:
-                s = df_p.groupby('ticker').agg(q=('quantity','sum'), i=('price', lambda x: (x*df_p.loc[x.index, 'quantity']).sum())).reset_index()
-                ts = s['ticker'].tolist()
-                try:
-                    cd = yf.download(ts, period='1d', group_by='ticker', progress=False)
-                    cur_p = {}
-                    for t in ts:
-                        try: 
-                            if len(ts) > 1: cur_p[t] = float(cd.iloc[-1][(t, 'Close')])
-                            else: cur_p[t] = float(cd.iloc[-1]['Close'])
-                        except: cur_p[t] = 0
-                    s['c'] = s['ticker'].map(cur_p)
-                except: s['c'] = 0
-                s['v'] = s['c']*s['q']; s['r'] = (s['v']-s['i'])/s['i']*100
-                d_df = s.rename(columns={'ticker':'종목','q':'수량','i':'매수금','c':'현재가','v':'평가액','r':'수익률'})
-                st.dataframe(d_df.style.format({'매수금':"{:,.0f}",'현재가':"{:,.0f}",'평가액':"{:,.0f}",'수익률':"{:.2f}%"}))
+            s, n_pend = get_holdings(user_email)
+            if n_pend: st.caption(f"⏳ 시트 반영 대기 {n_pend}건" + (" (재시도 중)" if get_trade_queue().last_error else ""))
+            if not s.empty:
+                with tracer.span("quotes", tickers=len(s)): cur_p = get_quote_service().get(s['ticker'].tolist())
+                s['c'] = s['ticker'].map(cur_p).fillna(0)
+                s['v'] = s['c']*s['quantity']; s['r'] = (s['v']-s['cost'])/s['cost']*100
+                d_df = s.rename(columns={'ticker':'종목','quantity':'수량','avg_price':'평균단가','cost':'매수금','c':'현재가','v':'평가액','r':'수익률'})
+                d_df = d_df[['종목','수량','평균단가','매수금','현재가','평가액','수익률']]
+                st.dataframe(d_df.style.format({'수량':"{:,.0f}",'평균단가':"{:,.0f}",'매수금':"{:,.0f}",'현재가':"{:,.0f}",'평가액':"{:,.0f}",'수익률':"{:.2f}%"}))
             
             with st.form("add"):
                 c1,c2 = st.columns(2)
@@ -445,9 +397,82 @@ def show_main_app():
                 c3,c4 = st.columns(2)
                 p = c3.text_input("단가"); q = c4.text_input("수량")
                 if st.form_submit_button("추가"):
-                    try: add_trade(user_email, t, d, float(p.replace(",","")), int(q.replace(",",""))); st.rerun()
-                    except: pass
+                    try: tp, tn = float(p.replace(",","")), int(q.replace(",",""))
+                    except ValueError: st.error("단가/수량을 숫자로 입력하세요.")
+                    else: add_trade(user_email, t, d, tp, tn); st.rerun()
+
+        with tab3:
+            with st.expander("일괄 비교 설정", expanded=True):
+                c1, c2 = st.columns(2)
+                sq = c1.text_input("종목", "삼성전자", key="sw_iq"); s_it = get_ticker(sq)
+                sbs = c2.text_input("예산", format_number(user_info.get("default_budget")), key="sw_bs")
+                try: smb = int(sbs.replace(",",""))
+                except ValueError: smb = 0
+                c3, c4 = st.columns(2)
+                s_intv = c3.multiselect("주기", ["매월", "매주", "매일"], ["매월", "매주"], key="sw_intv")
+                s_div = c4.multiselect("배당재투자", [True, False], [True, False], format_func=lambda x: "재투자" if x else "미재투자", key="sw_div")
+                c5, c6 = st.columns(2)
+                s_dates = c5.multiselect("매수 날짜", MONTH_DATES, MONTH_DATES, key="sw_dates")
+                s_days = c6.multiselect("요일 선택", list(WEEKDAYS), list(WEEKDAYS), key="sw_days")
+                s_yrs = st.slider("기간(년)", 1, 10, (1, 10), key="sw_yrs")
+
+            if st.button("⚡ 일괄 비교 시작", type="primary"):
+                grid = sweep_grid(s_intv, range(s_yrs[0], s_yrs[1]+1), s_div, s_days, s_dates)
+                raw = load_data(s_it)
+                if not grid: st.warning("조건을 하나 이상 선택하세요.")
+                elif raw is not None:
+                    with tracer.span("run_sweep", scenarios=len(grid)): sw = run_sweep(raw, grid, smb, align_fx(raw.index, load_fx()) if is_us_ticker(s_it) else 1.0)
+                    st.session_state['sweep_result'] = {'iq': sq, 'df': sw}
+                else: st.error("데이터 없음")
+
+            if 'sweep_result' in st.session_state:
+                sw = st.session_state['sweep_result']
+                st.subheader(f"⚡ {sw['iq']} 시나리오 비교 ({len(sw['df'])}건)")
+                d_df = sw['df'].assign(div=sw['df']['div'].map({True: "재투자", False: "미재투자"}), target=sw['df']['target'].astype(str))
+                d_df = d_df.rename(columns={'intv':'주기','target':'매수일','yrs':'기간(년)','div':'배당재투자','inv':'총 투자원금','val':'최종 평가액','prof':'수익률','xv':'XIRR','mdd':'MDD'})
+                st.dataframe(d_df.style.format({'총 투자원금':"{:,.0f}",'최종 평가액':"{:,.0f}",'수익률':"{:.2f}%",'XIRR':"{:.2f}%",'MDD':"{:.2f}%"}, na_rep="-"), use_container_width=True)
+
+        with tab4:
+            with st.expander("시작일 분석 설정", expanded=True):
+                c1, c2, c3 = st.columns(3)
+                rq = c1.text_input("종목", "삼성전자", key="rb_iq"); r_it = get_ticker(rq)
+                rbs = c2.text_input("예산", format_number(user_info.get("default_budget")), key="rb_bs")
+                try: rmb = int(rbs.replace(",",""))
+                except ValueError: rmb = 0
+                r_intv = c3.selectbox("주기", ["매월", "매주", "매일"], key="rb_intv")
+                r_day, r_date = "금요일", 1
+                c4, c5, c6 = st.columns(3)
+                if r_intv == "매주": r_day = c4.selectbox("요일 선택", list(WEEKDAYS), index=4, key="rb_day")
+                elif r_intv == "매월": r_date = c4.selectbox("매수 날짜", MONTH_DATES, index=0, key="rb_date")
+                r_yrs = c5.slider("기간(년)", 1, 10, 3, key="rb_yrs")
+                r_div = c6.checkbox("배당재투자", True, key="rb_div")
+
+            if st.button("🎲 시작일 분석 시작", type="primary"):
+                raw = load_data(r_it)
+                if raw is not None:
+                    mask = buy_schedule(raw.index, r_intv, r_day, r_date)
+                    fx = align_fx(raw.index, load_fx()) if is_us_ticker(r_it) else 1.0
+                    with tracer.span("rolling_backtest", intv=r_intv, yrs=r_yrs): rb = rolling_backtest(raw, mask, per_buy_amount(rmb, r_intv), r_yrs, fx, r_div)
+                    if rb.empty: st.warning(f"{r_yrs}년 이상의 데이터가 필요합니다.")
+                    else: st.session_state['rolling_result'] = {'iq': rq, 'yrs': r_yrs, 'df': rb}
+                else: st.error("데이터 없음")
+
+            if 'rolling_result' in st.session_state:
+                rr = st.session_state['rolling_result']; rb = rr['df']
+                st.subheader(f"🎲 {rr['iq']} {rr['yrs']}년 적립 시작일별 분포 ({len(rb):,}개 시작일)")
+                q = [5, 25, 50, 75, 95]
+                pct = pd.DataFrame({c: np.nanpercentile(rb[k], q) for c, k in [('수익률', 'prof'), ('XIRR', 'xv'), ('MDD', 'mdd')]}, index=[f"{p}%" for p in q])
+                st.dataframe(pct.style.format("{:.2f}%"))
+
+                # 가장 최근 시작일 결과가 전체 분포에서 어느 위치인지
+                last = rb['prof'].iloc[-1]
+                st.caption(f"최근 시작일({rb['start'].iloc[-1]:%Y-%m-%d}) 수익률 {last:.2f}% 는 전체 시작일 중 하위 {(rb['prof'] <= last).mean()*100:.0f}% 입니다.")
+
+                cnt, edges = np.histogram(rb['prof'].dropna(), bins=30)
+                st.bar_chart(pd.DataFrame({'수익률(%)': np.round(edges[:-1], 1), '시작일 수': cnt}), x='수익률(%)', y='시작일 수')
+                st.line_chart(rb.set_index('start')[['prof']].rename(columns={'prof': '수익률(%)'}))
 
 if __name__ == "__main__":
-    if "token" not in st.session_state: show_landing_page()
-    else: show_main_app()
+    with tracer.trace("landing" if "token" not in st.session_state else "main"):
+        if "token" not in st.session_state: show_landing_page()
+        else: show_main_app()
@@ -0,0 +1,139 @@
+import os
+import sys
+import json
+import time
+import argparse
+import warnings
+import tracemalloc
+import numpy as np
+import pandas as pd
+import simulation
+from simulation import run_simulation, per_buy_amount, calculate_mdd, xirr
+
+# ---------------------------------------------------------
+# 오프라인 벤치마크 (시뮬레이션 / XIRR / MDD / 차트 / PDF)
+# - 배당과 거래 공백이 있는 합성 가격 데이터(1, 3, 10, 30년)로 실행 (네트워크 불필요)
+# - 항목별 실행 시간(최소/중앙값)과 최대 메모리(tracemalloc)를 출력
+# - 저장된 기준값보다 느려지거나 메모리를 더 쓰면 [회귀] 표시 후 종료 코드 1
+#   python bench.py                    # 기준값과 비교
+#   python bench.py --save             # 현재 결과를 기준값으로 저장
+#   python bench.py -k sim --years 10  # 일부만 실행
+# ---------------------------------------------------------
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+BASELINE_PATH = os.path.join(ROOT, "bench_baseline.json")
+YEARS = [1, 3, 10, 30]
+INTERVALS = {"daily": "매일", "weekly": "매주", "monthly": "매월"}
+
+# 한글 폰트 서브셋 생성 시 fpdf 가 매번 내는 글리프 경고는 출력에서 제외
+warnings.filterwarnings("ignore", category=UserWarning, module="fpdf")
+
+# 영업일 기준 합성 가격: 무작위 결측(약 3%) + 2주 휴장 구간 + 분기 배당(약 0.5%)
+def synth_prices(years, seed=0):
+    rng = np.random.default_rng(seed)
+    idx = pd.bdate_range(end="2026-09-30", periods=int(252 * years))
+    keep = rng.random(len(idx)) > 0.03
+    gap = len(idx) // 2
+    keep[gap:gap + 10] = False
+    idx = idx[keep]
+    close = 50000 * np.exp(np.cumsum(rng.normal(0.0003, 0.012, len(idx))))
+    div = np.zeros(len(idx)); div[::63] = close[::63] * 0.005
+    return pd.DataFrame({"Close": close, "Dividends": div}, index=idx)
+
+def sim_params(intv, yrs):
+    return {"iq": "벤치", "it": "BENCH.KS", "mb": 1000000, "intv": intv, "target_day": "금요일",
+            "target_date": 1, "yrs": yrs, "div": True, "ai": False}
+
+# 매수 스케줄 캐시를 비워 첫 클릭과 같은 조건으로 측정
+def run_cold(p, frames):
+    simulation._schedules.clear()
+    return run_simulation(p, frames)
+
+# (이름, 인자 없는 함수) 목록
+def build_cases(years, pattern=None):
+    from report import create_chart, create_pdf
+    cases = []
+    for yrs in years:
+        df = synth_prices(yrs, seed=yrs)
+        for name, intv in INTERVALS.items():
+            p = sim_params(intv, yrs)
+            cases.append((f"sim/{name}/{yrs}y", lambda p=p, df=df: run_cold(p, [df])))
+
+        p = sim_params("매일", yrs)
+        daily = run_simulation(p, [df])
+        flows = [-per_buy_amount(p['mb'], p['intv'])] * (len(daily['dates']) - 1) + [daily['val']]
+        values = daily['df']['total_value']
+        cases.append((f"xirr/{yrs}y", lambda f=flows, d=daily['dates']: xirr(f, d)))
+        cases.append((f"mdd/{yrs}y", lambda v=values: calculate_mdd(v)))
+
+        res = run_simulation(sim_params("매월", yrs), [df])
+        chart = create_chart(res['df'], res['iq'], 10000, "만원", res['mask'])
+        cases.append((f"chart/{yrs}y", lambda r=res: create_chart(r['df'], r['iq'], 10000, "만원", r['mask'])))
+        cases.append((f"pdf/{yrs}y", lambda r=res, c=chart: create_pdf(r['iq'], "벤치마크 분석 텍스트", r['prof'], r['xv'], r['inv'], r['val'], r['exc'], c, r['mdd'])))
+    return [c for c in cases if pattern is None or pattern in c[0]]
+
+# 한 번 예열 후 repeat 회 측정, 메모리는 별도 1회 실행에서 측정
+def measure(fn, repeat):
+    fn()
+    times = []
+    for _ in range(repeat):
+        t = time.perf_counter(); fn(); times.append(time.perf_counter() - t)
+    tracemalloc.start()
+    try:
+        fn()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return {"min_ms": min(times) * 1000, "median_ms": float(np.median(times)) * 1000, "peak_mb": peak / 2**20}
+
+# 시간은 최소값 기준, 작은 절대 차이(노이즈)는 무시
+def compare(cur, base, tol, mem_tol, min_ms, min_mb):
+    if base is None: return "신규", []
+    bad = []
+    if cur["min_ms"] > base["min_ms"] * (1 + tol) and cur["min_ms"] - base["min_ms"] > min_ms:
+        bad.append(f"시간 {cur['min_ms'] / base['min_ms']:.2f}x")
+    if cur["peak_mb"] > base["peak_mb"] * (1 + mem_tol) and cur["peak_mb"] - base["peak_mb"] > min_mb:
+        bad.append(f"메모리 {cur['peak_mb'] / base['peak_mb']:.2f}x")
+    return ("회귀" if bad else "OK"), bad
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="시뮬레이션/차트/PDF 오프라인 벤치마크")
+    ap.add_argument("--years", type=int, nargs="+", default=YEARS)
+    ap.add_argument("-k", dest="pattern", default=None, help="이름에 이 문자열이 포함된 항목만 실행")
+    ap.add_argument("--repeat", type=int, default=5)
+    ap.add_argument("--baseline", default=BASELINE_PATH)
+    ap.add_argument("--save", action="store_true", help="결과를 기준값 파일에 저장 (기존 항목은 덮어씀)")
+    ap.add_argument("--tolerance", type=float, default=0.25, help="허용 시간 증가율")
+    ap.add_argument("--mem-tolerance", type=float, default=0.25, help="허용 메모리 증가율")
+    ap.add_argument("--min-ms", type=float, default=2.0, help="이보다 작은 시간 차이는 무시")
+    ap.add_argument("--min-mb", type=float, default=1.0, help="이보다 작은 메모리 차이는 무시")
+    args = ap.parse_args(argv)
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline, encoding="utf-8") as f: baseline = json.load(f).get("results", {})
+
+    results, failed = {}, []
+    print(f"{'항목':<18} {'최소(ms)':>10} {'중앙(ms)':>10} {'메모리(MB)':>11} {'기준(ms)':>10}  상태")
+    for name, fn in build_cases(args.years, args.pattern):
+        cur = results[name] = measure(fn, args.repeat)
+        base = baseline.get(name)
+        status, bad = compare(cur, base, args.tolerance, args.mem_tolerance, args.min_ms, args.min_mb)
+        base_txt = f"{base['min_ms']:,.1f}" if base else "-"
+        print(f"{name:<18} {cur['min_ms']:>10,.1f} {cur['median_ms']:>10,.1f} {cur['peak_mb']:>11,.1f} {base_txt:>10}  {status} {' '.join(bad)}".rstrip())
+        if bad: failed.append(f"{name}: {', '.join(bad)}")
+
+    if args.save:
+        baseline.update(results)
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump({"python": sys.version.split()[0], "numpy": np.__version__, "pandas": pd.__version__, "results": baseline}, f, indent=1, sort_keys=True)
+        print(f"\n기준값 저장: {args.baseline}")
+        return 0
+    if failed:
+        print(f"\n[회귀] {len(failed)}개 항목이 기준값보다 나빠졌습니다 (허용 {args.tolerance:.0%})")
+        for line in failed: print(f"  - {line}")
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,86 @@
+import hashlib
+import threading
+import numpy as np
+import pandas as pd
+from sheets_repo import trade_frame
+
+# ---------------------------------------------------------
+# 사용자별 보유 현황 스냅샷 (종목별 수량/매수금 누적, 새 거래 행만 반영)
+# ---------------------------------------------------------
+
+COLUMNS = ["ticker", "quantity", "cost", "avg_price"]
+
+# 거래 DataFrame -> 종목별 수량 합계와 매수금(단가 x 수량) 합계
+def aggregate(df):
+    if df is None or df.empty: return pd.DataFrame({"quantity": [], "cost": []}, index=pd.Index([], name="ticker"))
+    q = pd.to_numeric(df["quantity"], errors="coerce").fillna(0).to_numpy(dtype=float)
+    p = pd.to_numeric(df["price"], errors="coerce").fillna(0).to_numpy(dtype=float)
+    return pd.DataFrame({"ticker": df["ticker"].to_numpy(), "quantity": q, "cost": p * q}).groupby("ticker", sort=False).sum()
+
+def merge(a, b):
+    if b.empty: return a
+    if a.empty: return b
+    return a.add(b, fill_value=0.0)
+
+# 종목별 누적 값 -> ticker, quantity, cost, avg_price 표 (수량이 0 이면 평균단가 NaN)
+def holdings_table(totals):
+    out = totals.reset_index()
+    q = out["quantity"].to_numpy(dtype=float)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        out["avg_price"] = np.where(q != 0, out["cost"].to_numpy(dtype=float) / q, np.nan)
+    return out[COLUMNS]
+
+# 거래 값 리스트의 정규화된 (종목, 단가, 수량) 을 해시에 누적 (시트에서 다시 읽은 문자열 값과 같은 결과)
+def digest_rows(h, header, values):
+    if not values: return h
+    df = trade_frame(header, values)
+    p = df["price"].astype(float).tolist(); q = df["quantity"].astype(float).tolist()
+    h.update("".join(f"{t}\t{a!r}\t{b!r}\n" for t, a, b in zip(df["ticker"].astype(str), p, q)).encode())
+    return h
+
+# 시트에서 처리한 이 사용자의 거래 행 수(n), 마지막 시트 행 번호, 처리한 행의 해시, 종목별 누적 값
+class Snapshot:
+    def __init__(self, totals=None, n=0, last_row=None, digest=None, version=None):
+        self.totals = aggregate(None) if totals is None else totals
+        self.n = n
+        self.last_row = last_row
+        self.digest = digest or hashlib.sha1()
+        self.version = version   # 마지막으로 검증한 시트 인덱스 version
+
+    def extend(self, header, rows, version):
+        if not rows: return Snapshot(self.totals, self.n, self.last_row, self.digest, version)
+        values = [v for _, v in rows]
+        delta = aggregate(trade_frame(header, values))
+        return Snapshot(merge(self.totals, delta), self.n + len(rows), rows[-1][0], digest_rows(self.digest.copy(), header, values), version)
+
+    # 처리한 행이 지금 시트의 앞쪽 n 개 행과 같은지 (행 번호는 매번, 내용은 시트를 다시 읽었을 때만 확인)
+    def matches(self, version, header, rows):
+        if self.n > len(rows) or (self.n and rows[self.n-1][0] != self.last_row): return False
+        if version == self.version: return True
+        return digest_rows(hashlib.sha1(), header, [v for _, v in rows[:self.n]]).digest() == self.digest.digest()
+
+class HoldingsBook:
+    # repo: SheetRepo (trade_rows 제공)
+    def __init__(self, repo):
+        self.repo = repo
+        self._snaps = {}
+        self._lock = threading.Lock()
+
+    # 마지막으로 처리한 행 이후의 새 거래만 반영
+    # 시트를 다시 읽었을 때 이미 처리한 행이 수정/삭제되었으면 처음부터 다시 계산
+    def snapshot(self, email):
+        with self._lock: snap = self._snaps.get(email) or Snapshot()
+        version, header, rows = self.repo.trade_rows(email)
+        if not snap.matches(version, header, rows): snap = Snapshot()
+        if snap.n < len(rows) or snap.version != version:
+            snap = snap.extend(header, rows[snap.n:], version)
+            with self._lock: self._snaps[email] = snap
+        return snap
+
+    # 시트 반영 전 거래(pending DataFrame)는 스냅샷에 저장하지 않고 조회할 때만 더함
+    # 이미 시트에 기록된 trade_id 의 pending 행은 (저널 삭제 전이라도) 다시 더하지 않음
+    def holdings(self, email, pending=None):
+        totals = self.snapshot(email).totals
+        if pending is not None and not pending.empty and "trade_id" in pending:
+            pending = pending[~pending["trade_id"].isin(self.repo.sent_trade_ids(pending["trade_id"]))]
+        return holdings_table(merge(totals, aggregate(pending)))
@@ -0,0 +1,64 @@
+import os
+import re
+import ast
+import sys
+import argparse
+import subprocess
+
+# ---------------------------------------------------------
+# app.py 시작 시 import 비용 리포트
+# - app.py 의 모듈 최상단 import 문만 모아 새 인터프리터에서 `python -X importtime` 으로 실행
+# - 무거운 모듈이 시작 시점에 올라오거나 총 시간이 예산을 넘으면 종료 코드 1
+#   python import_report.py [--top 15] [--budget-ms 3000]
+# ---------------------------------------------------------
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+# 해당 기능을 쓸 때만 불러와야 하는 모듈
+HEAVY = ["matplotlib", "scipy", "google.generativeai", "fpdf", "gspread", "oauth2client", "yfinance", "report"]
+LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+# app.py 최상단의 import 문 (함수 안의 지연 import 는 제외)
+def top_level_imports(path):
+    with open(path, encoding="utf-8") as f: tree = ast.parse(f.read())
+    return [ast.unparse(n) for n in tree.body if isinstance(n, (ast.Import, ast.ImportFrom))]
+
+# (모듈 이름, 자체 시간 us, 누적 시간 us, 깊이) 목록
+def measure(stmts):
+    r = subprocess.run([sys.executable, "-X", "importtime", "-c", "\n".join(stmts)], cwd=ROOT, capture_output=True, text=True)
+    if r.returncode != 0: raise RuntimeError(r.stderr.strip().splitlines()[-1])
+    rows = []
+    for line in r.stderr.splitlines():
+        m = LINE.match(line)
+        if m: rows.append((m.group(4), int(m.group(1)), int(m.group(2)), len(m.group(3)) // 2))
+    return rows
+
+def is_heavy(name):
+    return any(name == h or name.startswith(h + ".") for h in HEAVY)
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="app.py 시작 시 import 시간 리포트")
+    ap.add_argument("--app", default=os.path.join(ROOT, "app.py"))
+    ap.add_argument("--top", type=int, default=15)
+    ap.add_argument("--budget-ms", type=float, default=None, help="총 import 시간 상한 (ms)")
+    args = ap.parse_args(argv)
+
+    rows = measure(top_level_imports(args.app))
+    roots = [r for r in rows if r[3] == 0]
+    total = sum(r[2] for r in roots) / 1000
+    print(f"총 import 시간: {total:,.0f} ms ({len(rows)}개 모듈)")
+    print(f"{'누적(ms)':>10} {'자체(ms)':>10}  모듈")
+    for name, self_us, cum_us, _ in sorted(roots, key=lambda r: -r[2])[:args.top]:
+        print(f"{cum_us/1000:>10,.1f} {self_us/1000:>10,.1f}  {name}")
+
+    ok = True
+    heavy = sorted({n.split(".")[0] if not n.startswith("google.") else "google.generativeai" for n, *_ in rows if is_heavy(n)})
+    if heavy:
+        ok = False
+        print(f"\n[실패] 시작 시점에 무거운 모듈이 로드됨: {', '.join(heavy)}")
+    if args.budget_ms is not None and total > args.budget_ms:
+        ok = False
+        print(f"\n[실패] 총 import 시간 {total:,.0f} ms > 예산 {args.budget_ms:,.0f} ms")
+    return 0 if ok else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
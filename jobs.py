@@ -0,0 +1,112 @@
+import time
+import uuid
+import threading
+import multiprocessing
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from tracing import tracer
+from price_store import FX_TICKER
+from ai import NO_AI, AI_FAILED, analysis_prompt
+from simulation import run_simulation, is_us_ticker
+
+# ---------------------------------------------------------
+# 백그라운드 작업 실행기
+# - 네트워크 작업(데이터 다운로드, AI 호출): 스레드 풀
+# - CPU 작업(시뮬레이션 계산): 프로세스 풀
+# ---------------------------------------------------------
+
+class Job:
+    def __init__(self):
+        self.id = uuid.uuid4().hex
+        self.status = "queued"    # queued / running / done / error
+        self.progress = 0.0
+        self.stage = "대기 중"
+        self.result = None
+        self.error = None
+        self.finished_at = None
+        self.runner = None
+
+    def update(self, progress, stage):
+        self.progress = progress; self.stage = stage
+
+    @property
+    def active(self):
+        return self.status in ("queued", "running")
+
+class JobRunner:
+    def __init__(self, io_workers=8, cpu_workers=None, use_processes=True, keep=3600):
+        self._io = ThreadPoolExecutor(max_workers=io_workers, thread_name_prefix="job-io")
+        self._cpu_workers = cpu_workers
+        self._cpu = None
+        self.use_processes = use_processes
+        self.keep = keep
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    # fn(job, *args, **kw) 를 스레드 풀에서 실행하고 작업 ID 반환
+    def submit(self, fn, *args, **kw):
+        job = Job(); job.runner = self
+        with self._lock:
+            self._prune()
+            self._jobs[job.id] = job
+        self._io.submit(self._run, job, fn, args, kw)
+        return job.id
+
+    def _run(self, job, fn, args, kw):
+        job.status = "running"
+        try:
+            job.result = fn(job, *args, **kw)
+            job.update(1.0, "완료"); job.status = "done"
+        except Exception as e:
+            job.error = e; job.status = "error"
+        job.finished_at = time.time()
+
+    # CPU 작업은 프로세스 풀에서 실행 (풀을 쓸 수 없으면 현재 스레드에서 실행)
+    def run_cpu(self, fn, *args):
+        if self.use_processes:
+            try: return self._cpu_pool().submit(fn, *args).result()
+            except (BrokenProcessPool, OSError):
+                with self._lock: self._cpu = None
+        return fn(*args)
+
+    def _cpu_pool(self):
+        with self._lock:
+            if self._cpu is None:
+                self._cpu = ProcessPoolExecutor(max_workers=self._cpu_workers, mp_context=multiprocessing.get_context("spawn"))
+            return self._cpu
+
+    def get(self, job_id):
+        return self._jobs.get(job_id)
+
+    def pop(self, job_id):
+        with self._lock: return self._jobs.pop(job_id, None)
+
+    # 결과를 가져가지 않은 오래된 작업 정리
+    def _prune(self):
+        now = time.time()
+        for k in [k for k, j in self._jobs.items() if j.finished_at and now - j.finished_at > self.keep]:
+            del self._jobs[k]
+
+# 시뮬레이션 작업: 가격 데이터(스레드) -> 계산(프로세스 풀) -> AI 분석(스레드)
+# - store: load(ticker) -> DataFrame, ai_client: generate(prompt) -> str (테스트에서는 가짜로 교체)
+# - 작업 스레드에서 실행되므로 추적 기록도 스크립트 실행과 별도의 Trace 로 남김
+def simulation_job(job, p, store, ai_client=None):
+    with tracer.trace("job:simulation"):
+        job.update(0.1, "가격 데이터 불러오는 중")
+        tickers = [t for _, t, _ in p['items']] if p.get('items') else [p['it']]
+        with tracer.span("price_store.load", tickers=len(tickers)): frames = [store.load(t) for t in tickers]
+        if not tickers or any(f is None or f.empty for f in frames): raise ValueError("데이터 없음")
+        fx = None
+        if any(is_us_ticker(t) for t in tickers):
+            try: fx = store.load(FX_TICKER)['Close']
+            except Exception as e: tracer.fail("load_fx", e)
+
+        job.update(0.4, "시뮬레이션 계산 중")
+        with tracer.span("run_simulation", intv=p['intv'], yrs=p['yrs']): res = job.runner.run_cpu(run_simulation, p, frames, fx)
+
+        res['ai'] = NO_AI
+        if p['ai'] and ai_client is not None:
+            job.update(0.8, "AI 분석 중")
+            try: res['ai'] = ai_client.generate(analysis_prompt(res, p['yrs']))
+            except Exception as e: tracer.fail("gemini", e); res['ai'] = AI_FAILED
+        return res
@@ -0,0 +1,99 @@
+import os
+import re
+import time
+import threading
+import pandas as pd
+from tracing import tracer
+
+# ---------------------------------------------------------
+# 가격 데이터 디스크 캐시 (종목별 Parquet + 증분 갱신)
+# ---------------------------------------------------------
+
+CACHE_DIR = os.environ.get("PRICE_CACHE_DIR", ".price_cache")
+FX_TICKER = "KRW=X"
+EVENT_COLUMNS = ["Dividends", "Stock Splits"]
+ADJ_RTOL = 1e-4   # 겹치는 봉의 종가가 이보다 많이 다르면 과거 구간이 재수정된 것으로 봄
+
+# 기본 다운로더: start 가 None 이면 전체 기간, 아니면 start 이후 구간만 요청
+def yf_history(t, start=None):
+    import yfinance as yf
+    tk = yf.Ticker(t)
+    d = tk.history(period="max") if start is None else tk.history(start=start.strftime("%Y-%m-%d"))
+    if d.index.tz is not None: d.index = d.index.tz_localize(None)
+    return d
+
+class PriceStore:
+    # downloader(ticker, start) -> DataFrame 를 주입하면 네트워크 없이 테스트 가능
+    def __init__(self, root=CACHE_DIR, downloader=yf_history, refresh_interval=3600):
+        self.root = root
+        self.downloader = downloader
+        self.refresh_interval = refresh_interval
+        self._locks = {}
+        self._locks_lock = threading.Lock()
+
+    def path(self, t):
+        return os.path.join(self.root, re.sub(r"[^A-Za-z0-9._-]", "_", t) + ".parquet")
+
+    def read(self, t):
+        p = self.path(t)
+        if not os.path.exists(p): return None
+        return pd.read_parquet(p)
+
+    def write(self, t, df):
+        os.makedirs(self.root, exist_ok=True)
+        p = self.path(t); tmp = f"{p}.{os.getpid()}.{threading.get_ident()}.tmp"
+        df.to_parquet(tmp)
+        os.replace(tmp, p)
+
+    def is_fresh(self, t):
+        p = self.path(t)
+        return os.path.exists(p) and time.time() - os.path.getmtime(p) < self.refresh_interval
+
+    # 종목별 잠금 (한 종목의 느린 다운로드가 다른 종목/환율 조회를 막지 않도록)
+    def _lock(self, t):
+        with self._locks_lock:
+            return self._locks.setdefault(t, threading.Lock())
+
+    # 캐시된 마지막 두 거래일부터 다시 받아 덮어씀 (장중 미완성 봉 교체)
+    # 다운로더는 수정주가를 주므로, 이미 확정된 겹치는 봉의 종가가 바뀌었거나
+    # 새 분할/배당이 있으면 과거 전체가 다시 수정된 것이므로 전체를 다시 받음
+    # force=False 면 잠금을 기다리는 사이 다른 세션이 갱신한 경우 다시 받지 않음
+    def refresh(self, t, force=True):
+        with self._lock(t):
+            if not force and self.is_fresh(t): return self.read(t)
+            cached = self.read(t)
+            if cached is None or cached.empty:
+                merged = self.downloader(t, None)
+            else:
+                check = cached.index[-2] if len(cached) > 1 else cached.index[-1]
+                new = self.downloader(t, check)
+                if new is None or new.empty:
+                    os.utime(self.path(t)); return cached
+                if is_readjusted(cached, new, check):
+                    merged = self.downloader(t, None)
+                else:
+                    merged = pd.concat([cached[cached.index < new.index.min()], new])
+                    merged = merged[~merged.index.duplicated(keep="last")].sort_index()
+            if merged is None or merged.empty: return cached
+            self.write(t, merged)
+            return merged
+
+    # 최근에 갱신된 캐시는 그대로 사용, 갱신 실패 시 기존 캐시로 대체
+    def load(self, t):
+        if self.is_fresh(t): return self.read(t)
+        try: return self.refresh(t, force=False)
+        except Exception as e:
+            tracer.fail("price_store.refresh", e)
+            return self.read(t)
+
+# new 가 cached 와 다르게 수정되었는지: check 봉의 종가 비교 + check 이후 새로 생긴 분할/배당
+def is_readjusted(cached, new, check):
+    if check in new.index:
+        a, b = float(cached.at[check, "Close"]), float(new.at[check, "Close"])
+        if abs(b - a) > ADJ_RTOL * abs(a): return True
+    tail = new[new.index >= check]
+    for c in EVENT_COLUMNS:
+        if c not in tail.columns: continue
+        old = cached[c].reindex(tail.index).fillna(0.0) if c in cached.columns else 0.0
+        if ((tail[c].fillna(0.0) != 0) & (tail[c].fillna(0.0) != old)).any(): return True
+    return False
@@ -0,0 +1,66 @@
+import time
+import threading
+from concurrent.futures import Future
+import pandas as pd
+
+# ---------------------------------------------------------
+# 현재가 조회 서비스 (프로세스 공용 TTL 캐시 + 일괄 조회 + 중복 요청 병합)
+# ---------------------------------------------------------
+
+# 기본 조회 함수: 여러 종목을 한 번에 받아 종목 -> 종가 dict 로 평탄화
+def yf_quotes(ts):
+    import yfinance as yf
+    cd = yf.download(list(ts), period="5d", group_by="ticker", progress=False)
+    out = {}
+    for t in ts:
+        try:
+            c = cd[t]["Close"] if isinstance(cd.columns, pd.MultiIndex) else cd["Close"]
+            out[t] = float(c.dropna().iloc[-1])
+        except (KeyError, IndexError): pass
+    return out
+
+class QuoteService:
+    # fetch(tickers) -> {ticker: price} 를 주입하면 네트워크 없이 테스트 가능
+    def __init__(self, fetch=yf_quotes, ttl=60, timeout=30):
+        self.fetch = fetch
+        self.ttl = ttl
+        self.timeout = timeout
+        self._cache = {}     # ticker -> (조회 시각, 가격 또는 None)
+        self._inflight = {}  # ticker -> Future
+        self._lock = threading.Lock()
+
+    def get(self, tickers):
+        ts = list(dict.fromkeys(t for t in tickers if t))
+        now = time.time()
+        out, wait, mine = {}, {}, []
+        with self._lock:
+            for t in ts:
+                hit = self._cache.get(t)
+                if hit and now - hit[0] < self.ttl:
+                    if hit[1] is not None: out[t] = hit[1]
+                elif t in self._inflight:
+                    wait[t] = self._inflight[t]
+                else:
+                    self._inflight[t] = Future(); mine.append(t)
+
+        # 다른 세션이 조회 중이 아닌 종목만 한 번에 요청
+        if mine:
+            try:
+                got = self.fetch(mine)
+            except Exception as e:
+                got = {}
+                with self._lock:
+                    for t in mine: self._inflight.pop(t).set_exception(e)
+            else:
+                with self._lock:
+                    for t in mine:
+                        p = got.get(t)
+                        self._cache[t] = (time.time(), p)
+                        self._inflight.pop(t).set_result(p)
+            out.update({t: got[t] for t in mine if got.get(t) is not None})
+
+        for t, f in wait.items():
+            try: p = f.result(self.timeout)
+            except Exception: p = None
+            if p is not None: out[t] = p
+        return out
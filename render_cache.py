@@ -0,0 +1,44 @@
+import hashlib
+import threading
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+
+# ---------------------------------------------------------
+# 차트/PDF 렌더링 결과 캐시 (크기 제한 LRU)
+# ---------------------------------------------------------
+
+class LRUCache:
+    def __init__(self, maxsize=32):
+        self.maxsize = maxsize
+        self._d = OrderedDict()
+        self._lock = threading.Lock()
+
+    # 캐시에 없으면 make() 로 만들어 저장 (만드는 동안은 잠그지 않음)
+    def get(self, key, make):
+        with self._lock:
+            if key in self._d:
+                self._d.move_to_end(key)
+                return self._d[key]
+        v = make()
+        with self._lock:
+            self._d[key] = v
+            self._d.move_to_end(key)
+            while len(self._d) > self.maxsize: self._d.popitem(last=False)
+        return v
+
+    def clear(self):
+        with self._lock: self._d.clear()
+
+    def __len__(self):
+        return len(self._d)
+
+# 시뮬레이션 결과(res_df + 요약 값)의 내용 해시
+def result_key(res):
+    h = hashlib.sha1()
+    h.update(pd.util.hash_pandas_object(res['df'], index=False).values.tobytes())
+    for k in sorted(res):
+        if k in ('df', 'dates', 'key'): continue
+        v = res[k]
+        h.update(v.tobytes() if isinstance(v, np.ndarray) else repr((k, v)).encode())
+    return h.hexdigest()
@@ -0,0 +1,150 @@
+import os
+import zlib
+import hashlib
+import functools
+import threading
+from io import BytesIO
+import numpy as np
+import matplotlib
+from matplotlib.figure import Figure
+import matplotlib.dates as mdates
+import matplotlib.font_manager as fm
+from fpdf import FPDF, set_global
+from PIL import Image
+
+# ---------------------------------------------------------
+# 차트/PDF 리포트 (무거운 모듈이므로 app.py 에서 처음 쓸 때 import)
+# - 폰트는 저장소에 포함된 NanumGothic 파일만 사용 (네트워크 다운로드 없음)
+# ---------------------------------------------------------
+
+FONT_DIR = os.path.dirname(os.path.abspath(__file__))
+FONT_REGULAR = os.path.join(FONT_DIR, "NanumGothic-Regular.ttf")
+FONT_BOLD = os.path.join(FONT_DIR, "NanumGothic-Bold.ttf")
+
+# fpdf 가 폰트 옆에 .pkl 메트릭 캐시를 쓰지 않도록 하고, 대신 프로세스 안에서 한 번만 파싱
+set_global("FPDF_CACHE_MODE", 1)
+_pdf_fonts = {}
+_pdf_fonts_lock = threading.Lock()
+
+# matplotlib 에 번들 폰트를 프로세스당 한 번 등록
+@functools.lru_cache(maxsize=None)
+def set_korean_font():
+    matplotlib.rcParams['axes.unicode_minus'] = False
+    if not os.path.exists(FONT_REGULAR): return None
+    fm.fontManager.addfont(FONT_REGULAR)
+    font_prop = fm.FontProperties(fname=FONT_REGULAR)
+    matplotlib.rcParams['font.family'] = font_prop.get_name()
+    return font_prop
+
+# 차트 생성 (26, 52, 78... 회차 마킹)
+def create_chart(df_history, ticker_name, unit_divider=1, unit_label="원", buy_mask=None):
+    font_prop = set_korean_font()
+    fig = Figure(figsize=(12, 7))
+    ax = fig.subplots()
+
+    dates = df_history['date']
+    val_series = df_history['total_value'] / unit_divider
+    inv_series = df_history['invested'] / unit_divider
+    inf_series = df_history['inflation_principal'] / unit_divider
+
+    # 메인 라인
+    ax.plot(dates, val_series, label='포트폴리오 가치', color='#FF5733', linewidth=2)
+    ax.plot(dates, inv_series, label='총 투자원금', color='#333333', linestyle='--', linewidth=1.5)
+    ax.plot(dates, inf_series, label='물가상승원금선 (연2%)', color='#2E86C1', linestyle=':', linewidth=1.5)
+
+    # 마커 및 텍스트 표시 (26회차, 52회차, 78회차...)
+    # 매수 스케줄이 있으면 실제 매수일 기준, 없으면 행 기준 (index 25가 26회차)
+    start_idx = 25
+    interval = 26
+    buy_rows = np.flatnonzero(buy_mask) if buy_mask is not None else np.arange(len(dates))
+
+    for k in range(start_idx, len(buy_rows), interval):
+        i = buy_rows[k]
+        date_val = dates.iloc[i]
+        price_val = val_series.iloc[i]
+
+        # 마커
+        ax.plot(date_val, price_val, marker='o', color='#C70039', markersize=6)
+
+        # 텍스트 라벨 (회차 및 금액)
+        label_text = f"{k+1}회차\n{price_val:,.0f}{unit_label}"
+        ax.annotate(label_text,
+                    xy=(date_val, price_val),
+                    xytext=(0, 15), textcoords='offset points',
+                    ha='center', fontsize=8, fontproperties=font_prop,
+                    bbox=dict(boxstyle="round,pad=0.3", fc="white", ec="gray", alpha=0.8))
+
+    ax.set_title(f"[{ticker_name}] DCA 투자 성과 추이", fontproperties=font_prop, fontsize=16)
+    ax.set_xlabel("기간 (월)", fontproperties=font_prop)
+    ax.set_ylabel(f"평가 금액 ({unit_label})", fontproperties=font_prop)
+
+    ax.xaxis.set_major_locator(mdates.MonthLocator(interval=max(1, len(dates)//10)))
+    ax.xaxis.set_major_formatter(mdates.DateFormatter('%Y-%m'))
+    ax.tick_params(axis='x', labelrotation=45)
+
+    ax.legend(prop=font_prop)
+    ax.grid(True, linestyle='--', alpha=0.5)
+    fig.tight_layout()
+
+    buf = BytesIO()
+    fig.savefig(buf, format="png", dpi=100)
+    buf.seek(0)
+    return buf
+
+class MemoryPDF(FPDF):
+    # 유니코드 TTF 는 처음 한 번만 파싱하고, 이후 문서에는 메트릭을 복사해 등록
+    def add_font(self, family, style='', fname='', uni=False):
+        if not uni: return super().add_font(family, style, fname, uni)
+        key = (family.lower(), style.upper(), fname)
+        with _pdf_fonts_lock:
+            if key not in _pdf_fonts:
+                probe = FPDF()
+                FPDF.add_font(probe, family, style, fname, uni)
+                fontkey = next(iter(probe.fonts))
+                _pdf_fonts[key] = (fontkey, probe.fonts[fontkey], probe.font_files[fontkey])
+        fontkey, font, files = _pdf_fonts[key]
+        if fontkey in self.fonts: return
+        # subset 은 문서마다 사용한 글자를 기록하므로 새 리스트로 복사
+        self.fonts[fontkey] = dict(font, i=len(self.fonts)+1, subset=list(font['subset']))
+        self.font_files[fontkey] = dict(files)
+        self.font_files[fname] = {'type': "TTF"}
+
+    # PNG 바이트를 임시 파일 없이 RGB 로 풀어 등록 (fpdf 의 PNG 알파 채널 분리 과정 생략)
+    def image_png(self, png, x=None, y=None, w=0, h=0):
+        name = "mem:" + hashlib.md5(png).hexdigest()
+        if name not in self.images:
+            im = Image.open(BytesIO(png)).convert("RGB")
+            self.images[name] = {'i': len(self.images)+1, 'w': im.width, 'h': im.height, 'cs': 'DeviceRGB', 'bpc': 8, 'f': 'FlateDecode', 'data': zlib.compress(im.tobytes())}
+        self.image(name, x, y, w, h)
+
+def create_pdf(ticker, ai_txt, prof, xirr_v, inv, val, exc, chart_buf, mdd):
+    pdf = MemoryPDF()
+    pdf.add_page()
+    hk = os.path.exists(FONT_REGULAR) and os.path.exists(FONT_BOLD)
+    pdf.add_font('Nanum', '', FONT_REGULAR, uni=True) if hk else None
+    pdf.add_font('Nanum', 'B', FONT_BOLD, uni=True) if hk else None
+    pdf.set_font('Nanum' if hk else 'Arial', 'B', 20)
+
+    pdf.cell(0, 15, txt=f"[{ticker}] Investment Report", ln=True, align='C')
+    pdf.ln(5)
+
+    xirr_txt = f"{xirr_v:.2f}%" if xirr_v == xirr_v else "-"
+    pdf.set_font('Nanum' if hk else 'Arial', '', 12)
+    pdf.set_fill_color(240, 240, 240)
+    pdf.cell(0, 10, txt=f" Total Invested: {inv:,.0f} KRW", ln=True, fill=True)
+    pdf.cell(0, 10, txt=f" Final Value: {val:,.0f} KRW", ln=True, fill=True)
+    pdf.cell(0, 10, txt=f" Return: {prof:.2f}% | XIRR: {xirr_txt} | MDD: {mdd:.2f}%", ln=True, fill=True)
+    pdf.cell(0, 10, txt=f" Excess Return: {exc:,.0f} KRW", ln=True, fill=True)
+    pdf.ln(10)
+
+    if chart_buf: pdf.image_png(chart_buf.getvalue(), x=10, w=190)
+    pdf.ln(10)
+    pdf.multi_cell(0, 8, txt=ai_txt)
+    return pdf.output(dest='S').encode('latin-1')
+
+# 로그인 직후 백그라운드에서 호출해 첫 차트/PDF 요청 전에 폰트를 준비
+def preload_fonts():
+    set_korean_font()
+    pdf = MemoryPDF()
+    if os.path.exists(FONT_REGULAR): pdf.add_font('Nanum', '', FONT_REGULAR, uni=True)
+    if os.path.exists(FONT_BOLD): pdf.add_font('Nanum', 'B', FONT_BOLD, uni=True)
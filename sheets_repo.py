@@ -0,0 +1,147 @@
+import time
+import threading
+import pandas as pd
+
+# ---------------------------------------------------------
+# Google Sheets 저장소 (워크시트 핸들/이메일 인덱스 캐시 + 일괄 쓰기)
+# ---------------------------------------------------------
+
+USER_SHEET = "user_settings"
+TRADE_SHEET = "sheet1"
+USER_HEADER = ["email", "nickname", "name", "default_budget"]
+TRADE_HEADER = ["user_email", "ticker", "date", "price", "quantity", "trade_id"]
+
+# 시트 전체를 한 번 읽어 이메일 -> 행 목록 인덱스를 만들고 TTL 동안 재사용
+# id_col 이 있으면 같은 id 가 다시 나온 행(재전송된 중복)은 인덱스에 넣지 않음
+class _SheetIndex:
+    def __init__(self, key_col, id_col=None):
+        self.key_col = key_col
+        self.id_col = id_col
+        self.loaded_at = None
+        self.header = []
+        self.rows = {}      # key -> [(시트 행 번호, 값 리스트), ...]
+        self.ids = set()    # 시트에 있는 id_col 값
+        self.n_rows = 0     # 헤더 포함 시트의 마지막 행 번호
+        self.version = 0    # 시트를 새로 읽을 때마다 증가
+
+    def _cols(self):
+        k = self.header.index(self.key_col) if self.key_col in self.header else 0
+        j = self.header.index(self.id_col) if self.id_col in self.header else None
+        return k, j
+
+    def _add(self, i, v, k, j):
+        if j is not None and len(v) > j and v[j]:
+            if v[j] in self.ids: return
+            self.ids.add(v[j])
+        if len(v) > k and v[k]: self.rows.setdefault(v[k], []).append((i, v))
+
+    def load(self, values):
+        self.header = values[0] if values else []
+        self.rows = {}; self.ids = set()
+        k, j = self._cols()
+        for i, v in enumerate(values[1:], start=2): self._add(i, v, k, j)
+        self.n_rows = len(values)
+        self.loaded_at = time.time()
+        self.version += 1
+
+    def is_fresh(self, ttl):
+        return self.loaded_at is not None and time.time() - self.loaded_at < ttl
+
+    def append(self, values):
+        k, j = self._cols()
+        for v in values:
+            self.n_rows += 1
+            self._add(self.n_rows, v, k, j)
+
+class SheetRepo:
+    # open_spreadsheet() -> gspread Spreadsheet (또는 같은 API 를 가진 가짜 객체)
+    def __init__(self, open_spreadsheet, ttl=60):
+        self._open = open_spreadsheet
+        self.ttl = ttl
+        self._ss = None
+        self._ws = {}
+        self._idx = {USER_SHEET: _SheetIndex("email"), TRADE_SHEET: _SheetIndex("user_email", "trade_id")}
+        self._lock = threading.RLock()
+
+    def worksheet(self, name):
+        with self._lock:
+            if name not in self._ws:
+                from gspread.exceptions import WorksheetNotFound
+                if self._ss is None: self._ss = self._open()
+                try: self._ws[name] = self._ss.worksheet(name)
+                except WorksheetNotFound: self._ws[name] = self._ss.add_worksheet(title=name, rows=100, cols=10)
+            return self._ws[name]
+
+    def _index(self, name):
+        with self._lock:
+            idx = self._idx[name]
+            if not idx.is_fresh(self.ttl):
+                idx.load(self.worksheet(name).get_all_values())
+            return idx
+
+    def invalidate(self, name=None):
+        with self._lock:
+            for n, idx in self._idx.items():
+                if name is None or n == name: idx.loaded_at = None
+
+    # 헤더가 없는 빈 시트면 헤더와 함께 한 번의 append_rows 로 기록
+    def _append(self, name, header, rows):
+        with self._lock:
+            idx = self._index(name)
+            if not idx.header:
+                self.worksheet(name).append_rows([header] + rows)
+                idx.load([header])
+            else:
+                self.worksheet(name).append_rows(rows)
+            idx.append(rows)
+
+    # ----- 사용자 설정 -----
+    def get_user(self, email):
+        hits = self._index(USER_SHEET).rows.get(email)
+        if not hits: return None
+        idx = self._idx[USER_SHEET]
+        v = hits[0][1] + [""] * (len(idx.header) - len(hits[0][1]))
+        return dict(zip(idx.header, v))
+
+    def upsert_user(self, email, nick, name, bud):
+        with self._lock:
+            idx = self._index(USER_SHEET)
+            hits = idx.rows.get(email)
+            if hits:
+                r, _ = hits[0]
+                self.worksheet(USER_SHEET).batch_update([{"range": f"B{r}:D{r}", "values": [[nick, name, bud]]}], raw=False)
+                hits[0] = (r, [email, nick, name, bud])
+            else:
+                self._append(USER_SHEET, USER_HEADER, [[email, nick, name, bud]])
+
+    # ----- 거래 내역 -----
+    # 행 끝의 trade_id 로 같은 거래가 두 번 기록되어도 한 번만 집계
+    # trade_id 열이 없는 예전 시트는 처음 기록할 때 헤더를 갱신
+    def add_trades(self, rows):
+        with self._lock:
+            idx = self._index(TRADE_SHEET)
+            if idx.header and "trade_id" not in idx.header:
+                col = chr(64 + len(TRADE_HEADER))
+                self.worksheet(TRADE_SHEET).batch_update([{"range": f"A1:{col}1", "values": [TRADE_HEADER]}], raw=False)
+                idx.header = list(TRADE_HEADER)
+            self._append(TRADE_SHEET, TRADE_HEADER, rows)
+
+    # ids 중 이미 시트에 기록된 trade_id (reload 면 캐시를 버리고 시트를 다시 읽어 확인)
+    def sent_trade_ids(self, ids, reload=False):
+        with self._lock:
+            if reload: self.invalidate(TRADE_SHEET)
+            return self._index(TRADE_SHEET).ids.intersection(ids)
+
+    # (인덱스 version, 헤더, 이 사용자의 거래 행 [(시트 행 번호, 값 리스트), ...])
+    # 행 목록은 인덱스가 가진 리스트 그대로이므로 호출한 쪽에서 필요한 구간만 잘라 사용
+    def trade_rows(self, email):
+        with self._lock:
+            idx = self._index(TRADE_SHEET)
+            return idx.version, idx.header, idx.rows.get(email, [])
+
+# 시트 값 리스트 -> 거래 DataFrame (가격/수량은 쉼표를 제거하고 숫자로 변환)
+def trade_frame(header, values):
+    df = pd.DataFrame([dict(zip(header, v)) for v in values], columns=header or TRADE_HEADER)
+    for c in ("price", "quantity"):
+        if c in df.columns: df[c] = pd.to_numeric(df[c].astype(str).str.replace(",", ""), errors="coerce")
+    return df
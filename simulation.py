@@ -0,0 +1,377 @@
+import hashlib
+import numpy as np
+import pandas as pd
+from render_cache import LRUCache
+
+# ---------------------------------------------------------
+# DCA 시뮬레이션 엔진 (Streamlit 의존성 없음)
+# ---------------------------------------------------------
+
+INFLATION_RATE = 0.02
+WEEKDAYS = {"월요일": 0, "화요일": 1, "수요일": 2, "목요일": 3, "금요일": 4}
+MONTH_DATES = [1, 15, 30]
+FX_FALLBACK = 1400.0
+REBALANCE = {"없음": None, "매월": "M", "분기": "Q", "매년": "Y"}
+
+# 기간(년) 만큼 마지막 거래일에서 거슬러 올라간 구간
+def slice_years(df, yrs):
+    return df[df.index >= (df.index.max() - pd.DateOffset(years=yrs))]
+
+# 주기별 1회 매수 금액 (월 예산 기준)
+def per_buy_amount(mb, intv):
+    if intv == "매주": return mb * 12 / 52
+    elif intv == "매일": return mb * 12 / 250
+    return mb
+
+# 일별 환율(USD/KRW) 을 가격 index 에 as-of 정렬 (이전 최근값, 시작 이전은 첫 값)
+def align_fx(index, fx, fallback=FX_FALLBACK):
+    if fx is not None: fx = fx[fx > 0].dropna().sort_index()
+    if fx is None or fx.empty: return np.full(len(index), fallback)
+    fx = fx[~fx.index.duplicated(keep="last")]
+    return fx.asof(index).bfill().fillna(fallback).to_numpy(dtype=float)
+
+# 매수일 스케줄: index 와 같은 길이의 bool 마스크 (매수일 True)
+# 같은 날짜 index/주기/매수일 조합은 한 번만 계산하고 시뮬레이션, XIRR, 차트가 공유
+_schedules = LRUCache(maxsize=256)
+
+def buy_schedule(index, intv, target_day="금요일", target_date=1):
+    target = target_day if intv == "매주" else target_date if intv == "매월" else None
+    key = (hashlib.sha1(index.values.view("i8").tobytes()).hexdigest(), intv, target)
+    return _schedules.get(key, lambda: _build_schedule(index, intv, target))
+
+def _build_schedule(index, intv, target):
+    n = len(index)
+    if intv == "매일": m = np.ones(n, dtype=bool)
+    elif intv == "매주": m = np.asarray(index.dayofweek == WEEKDAYS[target])
+    else:
+        # 매월: target 일 이후 첫 거래일, 없으면 그 달의 마지막 거래일
+        ym = ((index.year - 1970) * 12 + index.month - 1).to_numpy()
+        starts = np.flatnonzero(np.r_[True, ym[1:] != ym[:-1]])
+        ends = np.r_[starts[1:], n] - 1
+        first = ym[starts].astype("datetime64[M]").astype("datetime64[D]")
+        pos = index.searchsorted(first + np.timedelta64(target - 1, "D"))
+        m = np.zeros(n, dtype=bool)
+        m[np.minimum(pos, ends)] = True
+    m.flags.writeable = False
+    return m
+
+# MDD 계산
+def calculate_mdd(prices):
+    roll_max = prices.cummax()
+    drawdown = prices / roll_max - 1.0
+    mdd = drawdown.min()
+    return mdd * 100
+
+# XIRR 계산 (뉴턴법 + 해석적 도함수, 발산 시 Brent 법으로 대체)
+XIRR_BRACKET = np.array([-0.999, -0.9, -0.5, -0.2, 0.0, 0.1, 0.3, 0.6, 1.0, 2.0, 5.0, 10.0])
+
+def _year_fracs(d):
+    d = pd.DatetimeIndex(d)
+    return ((d - d[0]).days / 365.0).to_numpy(dtype=float)
+
+# NPV 와 dNPV/dr 를 한 번에 계산 (cfs: (S, N), r: (S,))
+def _npv(cfs, t, r):
+    v = (1.0 + r)[:, None] ** -t
+    npv = (cfs * v).sum(axis=1)
+    dnpv = -(t * cfs * v).sum(axis=1) / (1.0 + r)
+    return npv, dnpv
+
+def _xirr_brent(cf, t):
+    from scipy import optimize
+    f = lambda r: _npv(cf[None, :], t, np.array([r]))[0][0]
+    with np.errstate(over='ignore', invalid='ignore'):
+        vals = _npv(np.broadcast_to(cf, (len(XIRR_BRACKET), len(cf))), t, XIRR_BRACKET)[0]
+    for i in range(len(XIRR_BRACKET) - 1):
+        if np.isfinite(vals[i]) and np.isfinite(vals[i+1]) and vals[i] * vals[i+1] <= 0:
+            try: return optimize.brentq(f, XIRR_BRACKET[i], XIRR_BRACKET[i+1])
+            except (ValueError, RuntimeError): break
+    return np.nan
+
+# 여러 현금흐름을 한 번에 계산
+# - cfs: (S, N) 시나리오별 현금흐름 (흐름이 없는 날은 0)
+# - d: (N,) 공통 날짜 축
+# 해를 찾지 못한 행은 NaN
+def xirr_batch(cfs, d, guess=0.1, tol=1e-10, maxiter=50):
+    return xirr_solve(cfs, _year_fracs(d), guess, tol, maxiter)
+
+# t: 연 단위 경과 시간 ((N,) 공통 또는 (S, N) 행별)
+def xirr_solve(cfs, t, guess=0.1, tol=1e-10, maxiter=50):
+    cfs = np.atleast_2d(np.asarray(cfs, dtype=float))
+    t = np.asarray(t, dtype=float)
+    r = np.full(len(cfs), guess)
+    done = np.zeros(len(cfs), dtype=bool)
+    with np.errstate(over='ignore', invalid='ignore', divide='ignore'):
+        for _ in range(maxiter):
+            npv, dnpv = _npv(cfs, t, r)
+            step = npv / dnpv
+            r_new = np.where(done, r, r - step)
+            # r <= -1 로 넘어가면 -1 과의 중간값으로 당김
+            r_new = np.where(r_new <= -1.0, (r - 1.0) / 2.0, r_new)
+            done |= np.isfinite(r_new) & (np.abs(r_new - r) < tol)
+            r = r_new
+            if done.all(): break
+    r = np.where(done & np.isfinite(r), r, np.nan)
+    for i in np.flatnonzero(np.isnan(r)):
+        r[i] = _xirr_brent(cfs[i], t[i] if t.ndim == 2 else t)
+    return r
+
+def xirr(cf, d):
+    if len(cf) != len(d) or len(cf) < 2: return None
+    r = xirr_batch([cf], d)[0]
+    return None if np.isnan(r) else float(r)
+
+# 물가상승원금선: 매수 금액을 연 2% 로 일할 복리 증가 (paid 의 마지막 축이 날짜)
+def inflation_line(index, paid):
+    days = (index - index[0]).days.to_numpy(dtype=float)
+    f = (1.0 + INFLATION_RATE) ** (days / 365.0)
+    return f * np.cumsum(paid / f, axis=-1)
+
+# 여러 시나리오를 (시나리오 x 거래일) 행렬로 한 번에 계산
+# - masks: (S, N) bool 매수일 행렬
+# - amounts: (S,) 시나리오별 1회 매수 금액 (원화)
+# - fx: 원화 환산 비율 (스칼라 또는 (N,) 일별 배열)
+# - reinvest: (S,) 시나리오별 배당 재투자 여부
+def simulate_dca_batch(df, masks, amounts, fx=1.0, reinvest=True):
+    close = df['Close'].to_numpy(dtype=float)
+    masks = np.atleast_2d(np.asarray(masks, dtype=bool))
+    amounts = np.broadcast_to(np.asarray(amounts, dtype=float), masks.shape[:1])[:, None]
+    reinvest = np.broadcast_to(np.asarray(reinvest, dtype=bool), masks.shape[:1])[:, None]
+    fx = np.broadcast_to(np.asarray(fx, dtype=float), close.shape)
+
+    # 배당 재투자: 보유 수량이 (1 + 배당/가격) 배로 증가
+    if 'Dividends' in df.columns:
+        growth = 1.0 + df['Dividends'].fillna(0).to_numpy(dtype=float) / close
+    else:
+        growth = np.ones_like(close)
+    g = np.where(reinvest, np.cumprod(growth), 1.0)
+
+    # shares[t] = shares[t-1] * growth[t] + bought[t]  ->  g[t] * cumsum(bought / g)
+    bought = np.where(masks, amounts / (close * fx), 0.0)
+    shares = g * np.cumsum(bought / g, axis=1)
+
+    paid = np.where(masks, amounts, 0.0)
+    invested = np.cumsum(paid, axis=1)
+
+    return invested, shares * close * fx, inflation_line(df.index, paid)
+
+# 단일 시나리오 시뮬레이션 (res_df 형식으로 반환)
+def simulate_dca(df, mask, amount, fx=1.0, reinvest=True):
+    invested, value, inflation = simulate_dca_batch(df, mask, amount, fx, reinvest)
+    return pd.DataFrame({
+        "date": df.index,
+        "invested": invested[0],
+        "total_value": value[0],
+        "inflation_principal": inflation[0],
+    })
+
+# ---------------------------------------------------------
+# 여러 종목 포트폴리오 적립 (날짜 x 종목 행렬)
+# ---------------------------------------------------------
+
+# 종목별 가격을 하나의 달력(국내/해외 거래일 합집합)으로 정렬
+# 종가는 직전 값으로 채우고, 모든 종목의 가격이 있는 날부터 사용
+def align_prices(frames, names):
+    close = pd.concat([f['Close'] for f in frames], axis=1, keys=names).sort_index().ffill().dropna()
+    divs = pd.concat([f['Dividends'] if 'Dividends' in f.columns else pd.Series(0.0, index=f.index) for f in frames], axis=1, keys=names)
+    return close, divs.reindex(close.index).fillna(0.0)
+
+# 리밸런싱일 마스크: 기간(월/분기/년)의 마지막 거래일
+def rebalance_schedule(index, freq):
+    if freq is None: return None
+    p = index.to_period(freq)
+    return np.r_[p[1:] != p[:-1], False]
+
+# 매수일마다 amount 를 weights 비중으로 나눠 매수하고, 리밸런싱일 종가에 목표 비중으로 재분배
+# - close, divs: (N, K) 정렬된 가격/배당 (align_prices 결과)
+# - fx: 원화 환산 비율 (스칼라 또는 (N, K) 행렬)
+def simulate_portfolio(close, divs, mask, amount, weights, fx=1.0, reinvest=True, rebalance=None):
+    p = close.to_numpy(dtype=float)
+    w = np.asarray(weights, dtype=float); w = w / w.sum()
+    q = p * np.broadcast_to(np.asarray(fx, dtype=float), p.shape)   # 원화 가격
+    growth = 1.0 + divs.to_numpy(dtype=float) / p if reinvest else np.ones_like(p)
+
+    paid = np.where(mask, float(amount), 0.0)
+    bought = paid[:, None] * w / q
+
+    # 리밸런싱 사이 구간마다 shares = g * (h0 + cumsum(bought / g)) 를 종목 축 전체에 적용
+    n = len(p)
+    cuts = np.flatnonzero(rebalance) + 1 if rebalance is not None else np.array([], dtype=int)
+    bounds = [0, *cuts[cuts < n], n]
+    shares = np.empty_like(p); h0 = np.zeros(p.shape[1])
+    for s, e in zip(bounds[:-1], bounds[1:]):
+        g = np.cumprod(growth[s:e], axis=0)
+        shares[s:e] = g * (h0 + np.cumsum(bought[s:e] / g, axis=0))
+        h0 = w * (shares[e-1] @ q[e-1]) / q[e-1]
+
+    return pd.DataFrame({
+        "date": close.index,
+        "invested": np.cumsum(paid),
+        "total_value": (shares * q).sum(axis=1),
+        "inflation_principal": inflation_line(close.index, paid),
+    })
+
+# ---------------------------------------------------------
+# 시뮬레이션 실행 (화면 설정값 p -> sim_result)
+# ---------------------------------------------------------
+
+# 국내(.KS/.KQ) 외 종목은 달러 자산으로 보고 원화 환산
+def is_us_ticker(t):
+    return not (t.endswith(".KS") or t.endswith(".KQ"))
+
+# p: iq, it, mb, intv, target_day, target_date, yrs, div (+ 포트폴리오 모드: items, rebal)
+# frames: 종목별 가격 데이터 (단일 종목이면 [raw], 포트폴리오면 items 순서)
+# fx: USD/KRW 일별 종가 Series (없으면 FX_FALLBACK 사용)
+def run_simulation(p, frames, fx=None):
+    pt_krw = per_buy_amount(p['mb'], p['intv'])
+    if p.get('items'):
+        items = p['items']
+        close, divs = align_prices(frames, [t for _, t, _ in items])
+        close = slice_years(close, p['yrs']); divs = divs.loc[close.index]
+        mask = buy_schedule(close.index, p['intv'], p['target_day'], p['target_date'])
+        fx_us = align_fx(close.index, fx)
+        fx_m = np.column_stack([fx_us if is_us_ticker(t) else np.ones(len(close)) for _, t, _ in items])
+        res_df = simulate_portfolio(close, divs, mask, pt_krw, [w for _, _, w in items], fx_m, p['div'], rebalance_schedule(close.index, REBALANCE[p['rebal']]))
+        iq = " + ".join(f"{n} {w*100:.0f}%" for n, _, w in items)
+    else:
+        df = slice_years(frames[0], p['yrs'])
+        mask = buy_schedule(df.index, p['intv'], p['target_day'], p['target_date'])
+        res_df = simulate_dca(df, mask, pt_krw, align_fx(df.index, fx) if is_us_ticker(p['it']) else 1.0, p['div'])
+        iq = p['iq']
+    return summarize(res_df, mask, pt_krw, iq)
+
+# res_df 와 매수 스케줄로 최종 원금/평가액, 수익률, 초과수익, MDD, XIRR 계산
+def summarize(res_df, mask, pt_krw, iq):
+    fin_inv = res_df['invested'].iloc[-1]
+    fin_val = res_df['total_value'].iloc[-1]
+    fin_inf = res_df['inflation_principal'].iloc[-1]
+
+    prof = (fin_val - fin_inv) / fin_inv * 100
+    exc = fin_val - fin_inf
+    mdd = calculate_mdd(res_df['total_value'])
+
+    x_dates = list(res_df['date'][mask]) + [res_df['date'].iloc[-1]]
+    x_flows = [-pt_krw]*int(mask.sum()) + [fin_val]
+    x = xirr(x_flows, x_dates)
+    xv = x * 100 if x is not None else float('nan')
+
+    return {'df': res_df, 'iq': iq, 'inv': fin_inv, 'val': fin_val, 'prof': prof,
+            'exc': exc, 'xv': xv, 'mdd': mdd, 'dates': x_dates, 'mask': mask}
+
+# ---------------------------------------------------------
+# 파라미터 스윕 (여러 시나리오 일괄 비교)
+# ---------------------------------------------------------
+
+# 주기/매수일/기간/배당재투자 조합 생성
+def sweep_grid(intervals, yrs_list, div_options=(True, False), days=None, dates=None):
+    days = list(WEEKDAYS) if days is None else days
+    dates = MONTH_DATES if dates is None else dates
+    grid = []
+    for intv in intervals:
+        targets = days if intv == "매주" else dates if intv == "매월" else [""]
+        for tg in targets:
+            for yrs in yrs_list:
+                for dv in div_options:
+                    grid.append({"intv": intv, "target": tg, "yrs": yrs, "div": dv})
+    return grid
+
+# 가장 긴 기간 구간 위에서 모든 시나리오를 한 번에 계산하고 결과 표 반환
+def run_sweep(df, grid, mb, fx=1.0):
+    base = slice_years(df, max(s["yrs"] for s in grid))
+    fx = np.broadcast_to(np.asarray(fx, dtype=float), (len(df),))[-len(base):]
+    n = len(base)
+
+    masks = np.zeros((len(grid), n), dtype=bool)
+    amounts = np.empty(len(grid))
+    for i, s in enumerate(grid):
+        start = n - len(slice_years(base, s["yrs"]))
+        w = base.index[start:]
+        if s["intv"] == "매주": m = buy_schedule(w, s["intv"], target_day=s["target"])
+        elif s["intv"] == "매월": m = buy_schedule(w, s["intv"], target_date=s["target"])
+        else: m = buy_schedule(w, s["intv"])
+        masks[i, start:] = m
+        amounts[i] = per_buy_amount(mb, s["intv"])
+
+    invested, value, _ = simulate_dca_batch(base, masks, amounts, fx, [s["div"] for s in grid])
+
+    # 구간 시작 이전(0/0)은 NaN 으로 두고 무시
+    with np.errstate(divide='ignore', invalid='ignore'):
+        dd = value / np.maximum.accumulate(value, axis=1) - 1.0
+    mdd = np.nanmin(np.where(np.isfinite(dd), dd, np.nan), axis=1) * 100
+
+    fin_inv = invested[:, -1]; fin_val = value[:, -1]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        prof = (fin_val - fin_inv) / fin_inv * 100
+
+    # 매수일 -금액, 마지막 날 +평가액 인 현금흐름 행렬로 XIRR 일괄 계산
+    cfs = np.where(masks, -amounts[:, None], 0.0)
+    cfs[:, -1] += fin_val
+    xv = xirr_batch(cfs, base.index) * 100
+
+    res = pd.DataFrame(grid)
+    res["inv"] = fin_inv; res["val"] = fin_val; res["prof"] = prof
+    res["xv"] = xv; res["mdd"] = mdd
+    return res
+
+# ---------------------------------------------------------
+# 시작일별 백테스트 (가능한 모든 시작일에 대해 yrs 년 적립)
+# ---------------------------------------------------------
+
+# 누적합으로 각 구간의 최종 평가액/원금을 O(1) 에 계산하고,
+# MDD 와 XIRR 은 구간 단위 행렬을 chunk 행씩 나눠 일괄 계산
+# 매수일은 전체 기간 스케줄(mask)을 모든 구간이 공유
+def rolling_backtest(df, mask, amount, yrs, fx=1.0, reinvest=True, chunk=512):
+    index = df.index
+    close = df['Close'].to_numpy(dtype=float)
+    mask = np.asarray(mask, dtype=bool)
+    fx = np.broadcast_to(np.asarray(fx, dtype=float), close.shape)
+
+    # 구간 [a, b]: a 에서 시작해 yrs 년 뒤 이전의 마지막 거래일 b 까지
+    ends = index.searchsorted(index + pd.DateOffset(years=yrs), side="right") - 1
+    a = np.flatnonzero(index + pd.DateOffset(years=yrs) <= index[-1])
+    b = ends[a]
+    if len(a) == 0: return pd.DataFrame(columns=["start", "end", "inv", "val", "prof", "xv", "mdd"])
+
+    if reinvest and 'Dividends' in df.columns:
+        g = np.cumprod(1.0 + df['Dividends'].fillna(0).to_numpy(dtype=float) / close)
+    else:
+        g = np.ones_like(close)
+    unit = g * close * fx                       # 보유 1 "기준 수량" 의 원화 가치
+    c = np.r_[0.0, np.cumsum(np.where(mask, amount / (close * fx), 0.0) / g)]
+    k = np.r_[0, np.cumsum(mask)]
+
+    n_buy = k[b + 1] - k[a]
+    inv = n_buy * float(amount)
+    val = unit[b] * (c[b + 1] - c[a])
+
+    # XIRR 용 매수일 위치와 MDD 용 구간 길이
+    buy_pos = np.flatnonzero(mask)
+    t_all = (index - index[0]).days.to_numpy(dtype=float) / 365.0
+    width = int((b - a).max()) + 1
+    max_buys = int(n_buy.max())
+
+    mdd = np.empty(len(a)); xv = np.empty(len(a))
+    for s in range(0, len(a), chunk):
+        aa = a[s:s+chunk]; bb = b[s:s+chunk]
+
+        # 구간 내 일별 평가액 (구간 밖은 NaN, 첫 매수 전 0/0 도 NaN)
+        idx = aa[:, None] + np.arange(width)
+        inside = idx <= bb[:, None]
+        idx = np.minimum(idx, len(index) - 1)
+        v = np.where(inside, unit[idx] * (c[idx + 1] - c[aa][:, None]), np.nan)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            dd = v / np.fmax.accumulate(v, axis=1) - 1.0
+        mdd[s:s+chunk] = np.nanmin(np.where(np.isfinite(dd), dd, np.nan), axis=1) * 100
+
+        # 현금흐름: 구간 내 매수일마다 -amount, 마지막 열에 +평가액
+        j = k[aa][:, None] + np.arange(max_buys)
+        valid = j < k[bb + 1][:, None]
+        pos = buy_pos[np.minimum(j, max(len(buy_pos) - 1, 0))] if len(buy_pos) else np.zeros_like(j)
+        t = np.where(valid, t_all[pos] - t_all[aa][:, None], 0.0)
+        cfs = np.where(valid, -float(amount), 0.0)
+        t = np.concatenate([t, (t_all[bb] - t_all[aa])[:, None]], axis=1)
+        cfs = np.concatenate([cfs, val[s:s+chunk][:, None]], axis=1)
+        xv[s:s+chunk] = xirr_solve(cfs, t) * 100
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        prof = (val - inv) / inv * 100
+    return pd.DataFrame({"start": index[a], "end": index[b], "inv": inv, "val": val, "prof": prof, "xv": xv, "mdd": mdd})
@@ -0,0 +1,44 @@
+import re
+from gspread.exceptions import WorksheetNotFound
+
+# ---------------------------------------------------------
+# 테스트용 메모리 gspread (SheetRepo 가 쓰는 API 만 구현)
+# ---------------------------------------------------------
+
+class FakeWorksheet:
+    def __init__(self, title):
+        self.title = title
+        self.values = []
+        self.calls = []
+
+    # 실제 시트처럼 모든 값을 문자열로 돌려줌
+    def get_all_values(self):
+        self.calls.append("get_all_values")
+        return [[str(v) for v in row] for row in self.values]
+
+    def append_rows(self, rows, **kw):
+        self.calls.append("append_rows")
+        self.values += [list(r) for r in rows]
+
+    def batch_update(self, data, raw=True):
+        self.calls.append("batch_update")
+        for d in data:
+            m = re.match(r"([A-Z])(\d+):([A-Z])(\d+)", d["range"])
+            c0, r0 = ord(m.group(1)) - 65, int(m.group(2))
+            for i, row in enumerate(d["values"]):
+                cur = self.values[r0 - 1 + i]
+                for j, v in enumerate(row):
+                    while len(cur) <= c0 + j: cur.append("")
+                    cur[c0 + j] = v
+
+class FakeSpreadsheet:
+    def __init__(self):
+        self.sheets = {}
+
+    def worksheet(self, name):
+        if name not in self.sheets: raise WorksheetNotFound(name)
+        return self.sheets[name]
+
+    def add_worksheet(self, title, rows, cols):
+        self.sheets[title] = FakeWorksheet(title)
+        return self.sheets[title]
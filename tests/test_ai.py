@@ -0,0 +1,96 @@
+import time
+import sqlite3
+import threading
+from types import SimpleNamespace
+import pytest
+import ai
+from ai import CachedAIClient
+
+class FakeClient:
+    def __init__(self, model="fake", fail=False, gate=None):
+        self.model = model
+        self.fail = fail
+        self.gate = gate
+        self.calls = []
+
+    def generate(self, prompt):
+        self.calls.append(prompt)
+        if self.gate is not None: self.gate.wait(5)
+        if self.fail: raise RuntimeError("quota")
+        return f"답변 {len(self.calls)}"
+
+def clock(monkeypatch, start=1000.0):
+    now = [start]
+    monkeypatch.setattr(ai, "time", SimpleNamespace(time=lambda: now[0]))
+    return now
+
+def keys(path):
+    with sqlite3.connect(path) as c:
+        return {k for (k,) in c.execute("SELECT key FROM ai_cache")}
+
+def test_same_prompt_is_served_from_disk(tmp_path):
+    path = str(tmp_path / "ai.db")
+    fake = FakeClient()
+    assert CachedAIClient(fake, path).generate("종목:QQQ,  기간:3년") == "답변 1"
+    # 공백만 다른 프롬프트, 새 프로세스(새 인스턴스) 도 같은 캐시
+    assert CachedAIClient(fake, path).generate("종목:QQQ, 기간:3년\n") == "답변 1"
+    assert len(fake.calls) == 1
+    # 모델이 다르면 별도 항목
+    assert CachedAIClient(FakeClient(model="other"), path).generate("종목:QQQ, 기간:3년") == "답변 1"
+    assert len(keys(path)) == 2
+
+def test_ttl_expiry(tmp_path, monkeypatch):
+    now = clock(monkeypatch)
+    fake = FakeClient()
+    c = CachedAIClient(fake, str(tmp_path / "ai.db"), ttl=60)
+    c.generate("a")
+    now[0] += 59; assert c.generate("a") == "답변 1"
+    now[0] += 2; assert c.generate("a") == "답변 2"
+    assert fake.calls == ["a", "a"]
+
+def test_lru_eviction_by_max_entries(tmp_path, monkeypatch):
+    now = clock(monkeypatch)
+    path = str(tmp_path / "ai.db")
+    fake = FakeClient()
+    c = CachedAIClient(fake, path, max_entries=2)
+    for p in ("a", "b"):
+        c.generate(p); now[0] += 1
+    c.generate("a"); now[0] += 1     # a 를 최근 사용으로 갱신
+    c.generate("c")
+    assert keys(path) == {ai.prompt_key("fake", "a"), ai.prompt_key("fake", "c")}
+    c.generate("b")
+    assert fake.calls == ["a", "b", "c", "b"]
+    assert len(keys(path)) == 2
+
+def run_concurrently(c, n, prompt="같은 질문"):
+    out = [None] * n
+    def work(i):
+        try: out[i] = c.generate(prompt)
+        except Exception as e: out[i] = e
+    th = [threading.Thread(target=work, args=(i,)) for i in range(n)]
+    for t in th: t.start()
+    return th, out
+
+def test_concurrent_identical_prompts_share_one_call(tmp_path):
+    gate = threading.Event()
+    fake = FakeClient(gate=gate)
+    th, out = run_concurrently(CachedAIClient(fake, str(tmp_path / "ai.db")), 6)
+    time.sleep(0.2); gate.set()
+    for t in th: t.join(5)
+    assert len(fake.calls) == 1 and out == ["답변 1"] * 6
+
+def test_errors_reach_every_waiter_and_are_not_cached(tmp_path):
+    gate = threading.Event()
+    fake = FakeClient(fail=True, gate=gate)
+    c = CachedAIClient(fake, str(tmp_path / "ai.db"))
+    th, out = run_concurrently(c, 4)
+    time.sleep(0.2); gate.set()
+    for t in th: t.join(5)
+    assert len(fake.calls) == 1
+    assert all(isinstance(e, RuntimeError) for e in out)
+    assert keys(c.path) == set() and c._inflight == {}
+
+    fake.fail = False
+    assert c.generate("같은 질문") == "답변 2"
+    fake.fail = True
+    with pytest.raises(RuntimeError): c.generate("다른 질문")
@@ -0,0 +1,94 @@
+import numpy as np
+import pandas as pd
+import holdings
+from fake_gspread import FakeSpreadsheet
+from sheets_repo import SheetRepo, TRADE_SHEET, TRADE_HEADER, trade_frame
+from holdings import HoldingsBook
+
+def make_book():
+    ss = FakeSpreadsheet()
+    repo = SheetRepo(lambda: ss, ttl=60)
+    return ss, repo, HoldingsBook(repo)
+
+# 예전 tab2 계산 (groupby + 매수금 lambda) 과 같은 결과인지 비교
+def expected(ss, email, pending=None):
+    vals = [v for v in ss.sheets[TRADE_SHEET].get_all_values()[1:] if v[0] == email]
+    df = trade_frame(TRADE_HEADER, vals)
+    if pending is not None: df = pd.concat([df, pending], ignore_index=True)
+    return df.groupby('ticker').agg(q=('quantity', 'sum'), i=('price', lambda x: (x*df.loc[x.index, 'quantity']).sum()))
+
+def check(book, ss, email, pending=None):
+    got = book.holdings(email, pending).set_index("ticker").sort_index()
+    exp = expected(ss, email, pending).sort_index()
+    assert list(got.index) == list(exp.index)
+    assert np.allclose(got["quantity"], exp["q"]) and np.allclose(got["cost"], exp["i"])
+    assert np.allclose(got["avg_price"], got["cost"] / got["quantity"])
+    return got
+
+def trades(email, n, seed):
+    rng = np.random.default_rng(seed)
+    return [[email, str(rng.choice(["AAPL", "QQQ", "005930.KS"])), "2024-01-02", round(float(rng.uniform(10, 2000)), 2), int(rng.integers(1, 10))] for _ in range(n)]
+
+def test_incremental_matches_full_recompute(monkeypatch):
+    ss, repo, book = make_book()
+    repo.add_trades(trades("a@x", 200, 0) + trades("b@x", 100, 1))
+    check(book, ss, "a@x")
+
+    seen = []
+    real = holdings.aggregate
+    monkeypatch.setattr(holdings, "aggregate", lambda df: seen.append(0 if df is None else len(df)) or real(df))
+    for i in range(3):
+        repo.add_trades(trades("a@x", 5, 10 + i))
+        check(book, ss, "a@x")
+    # 조회마다 새로 추가된 5행만 집계 (pending 은 None)
+    assert [n for n in seen if n] == [5, 5, 5]
+    assert book.snapshot("a@x").n == 215
+
+def test_reload_with_same_content_keeps_snapshot():
+    ss, repo, book = make_book()
+    repo.add_trades(trades("a@x", 20, 0))
+    before = book.snapshot("a@x")
+    repo.invalidate()
+    after = book.snapshot("a@x")
+    assert after.n == before.n and after.totals is before.totals
+
+def test_in_place_edit_is_picked_up_after_reload():
+    ss, repo, book = make_book()
+    repo.add_trades([["a@x", "QQQ", "2024-01-02", 100.0, 2], ["a@x", "SPY", "2024-01-03", 200.0, 1]])
+    check(book, ss, "a@x")
+    ss.sheets[TRADE_SHEET].values[1][3] = "150"
+    repo.invalidate()
+    got = check(book, ss, "a@x")
+    assert got.loc["QQQ", "cost"] == 300.0
+
+def test_deleted_row_triggers_rebuild():
+    ss, repo, book = make_book()
+    repo.add_trades(trades("a@x", 10, 0) + trades("b@x", 10, 1))
+    check(book, ss, "a@x"); check(book, ss, "b@x")
+    del ss.sheets[TRADE_SHEET].values[1]
+    repo.invalidate()
+    check(book, ss, "a@x"); check(book, ss, "b@x")
+
+def test_pending_trades_are_added_but_not_stored():
+    ss, repo, book = make_book()
+    repo.add_trades([["a@x", "QQQ", "2024-01-02", 100.0, 2]])
+    pend = pd.DataFrame([["a@x", "NEW", "2024-01-03", 50.0, 4, "q-1"]], columns=TRADE_HEADER)
+    got = check(book, ss, "a@x", pend)
+    assert got.loc["NEW", "avg_price"] == 50.0
+    assert "NEW" not in book.snapshot("a@x").totals.index
+    assert book.holdings("none@x").empty
+
+def test_duplicate_trade_ids_are_counted_once():
+    ss, repo, book = make_book()
+    repo.add_trades([["a@x", "QQQ", "2024-01-02", 100.0, 2, "q-1"], ["a@x", "SPY", "2024-01-03", 200.0, 1, "q-2"]])
+    # 전송 실패로 같은 배치가 다시 기록된 경우
+    repo.add_trades([["a@x", "QQQ", "2024-01-02", 100.0, 2, "q-1"]])
+    got = book.holdings("a@x").set_index("ticker")
+    assert got.loc["QQQ", "quantity"] == 2 and got.loc["QQQ", "cost"] == 200.0
+    repo.invalidate()
+    assert book.holdings("a@x").set_index("ticker").loc["QQQ", "quantity"] == 2
+
+    # 시트에 기록됐지만 저널에서 아직 지워지지 않은 pending 행도 한 번만
+    pend = pd.DataFrame([["a@x", "SPY", "2024-01-03", 200.0, 1, "q-2"], ["a@x", "QQQ", "2024-01-04", 110.0, 1, "q-3"]], columns=TRADE_HEADER)
+    got = book.holdings("a@x", pend).set_index("ticker")
+    assert got.loc["SPY", "quantity"] == 1 and got.loc["QQQ", "quantity"] == 3
@@ -0,0 +1,67 @@
+import time
+import numpy as np
+import pandas as pd
+from ai import NO_AI, AI_FAILED
+from jobs import JobRunner, simulation_job
+
+class StubStore:
+    def __init__(self, frames):
+        self.frames = frames
+        self.loaded = []
+
+    def load(self, t):
+        self.loaded.append(t)
+        return self.frames.get(t)
+
+class FakeAI:
+    def __init__(self, fail=False):
+        self.fail = fail
+        self.prompts = []
+
+    def generate(self, prompt):
+        self.prompts.append(prompt)
+        if self.fail: raise RuntimeError("quota")
+        return "가짜 분석"
+
+def prices(years=3, seed=0):
+    rng = np.random.default_rng(seed)
+    idx = pd.bdate_range(end="2026-09-30", periods=252 * years)
+    close = 100 * np.exp(np.cumsum(rng.normal(0.0003, 0.01, len(idx))))
+    return pd.DataFrame({"Close": close, "Dividends": 0.0}, index=idx)
+
+def params(**kw):
+    p = {"iq": "삼성전자", "it": "005930.KS", "mb": 1000000, "intv": "매월", "target_day": "금요일",
+         "target_date": 1, "yrs": 2, "div": True, "ai": True, "items": None, "rebal": None}
+    p.update(kw)
+    return p
+
+def run(runner, *args):
+    job = runner.get(runner.submit(simulation_job, *args))
+    for _ in range(200):
+        if not job.active: break
+        time.sleep(0.02)
+    return job
+
+def test_simulation_job_with_fake_ai():
+    runner = JobRunner(use_processes=False)
+    ai = FakeAI()
+    store = StubStore({"005930.KS": prices()})
+    job = run(runner, params(), store, ai)
+    assert job.status == "done", job.error
+    res = job.result
+    assert res["ai"] == "가짜 분석" and len(ai.prompts) == 1
+    assert res["inv"] == res["mask"].sum() * 1000000 and res["val"] > 0
+    assert store.loaded == ["005930.KS"]
+
+def test_simulation_job_ai_failure_and_missing_data():
+    runner = JobRunner(use_processes=False)
+    store = StubStore({"QQQ": prices(seed=1), "KRW=X": prices(seed=2)})
+    job = run(runner, params(it="QQQ"), store, FakeAI(fail=True))
+    assert job.status == "done" and job.result["ai"] == AI_FAILED
+    assert store.loaded == ["QQQ", "KRW=X"]
+
+    job = run(runner, params(it="QQQ", ai=False), store, FakeAI())
+    assert job.result["ai"] == NO_AI
+
+    job = run(runner, params(it="NONE"), store, FakeAI())
+    assert job.status == "error" and str(job.error) == "데이터 없음"
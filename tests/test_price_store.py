@@ -0,0 +1,74 @@
+import threading
+import pandas as pd
+from price_store import PriceStore
+
+# 수정주가를 주는 가짜 다운로더: history 를 바꾸면 다음 호출부터 반영
+class FakeYahoo:
+    def __init__(self, history):
+        self.history = history
+        self.calls = []
+
+    def __call__(self, t, start):
+        self.calls.append(start)
+        d = self.history
+        return d if start is None else d[d.index >= start]
+
+def bars(closes, start="2024-01-01", **cols):
+    idx = pd.bdate_range(start, periods=len(closes))
+    return pd.DataFrame({"Close": closes, "Dividends": cols.get("div", [0.0] * len(closes)),
+                         "Stock Splits": cols.get("split", [0.0] * len(closes))}, index=idx)
+
+def test_incremental_refresh_appends_new_bars(tmp_path):
+    y = FakeYahoo(bars([100.0, 101.0, 102.0]))
+    ps = PriceStore(str(tmp_path), y)
+    ps.refresh("T")
+    y.history = bars([100.0, 101.0, 102.0, 103.0, 104.0])
+    got = ps.refresh("T")
+    assert got["Close"].tolist() == [100.0, 101.0, 102.0, 103.0, 104.0]
+    assert y.calls == [None, y.history.index[1]]
+
+def test_split_triggers_full_redownload(tmp_path):
+    y = FakeYahoo(bars([100.0, 100.0, 100.0]))
+    ps = PriceStore(str(tmp_path), y)
+    ps.refresh("T")
+    # 10:1 분할 후 Yahoo 는 과거 종가를 모두 1/10 로 수정해서 돌려줌
+    y.history = bars([10.0, 10.0, 10.0, 10.0, 10.0], split=[0, 0, 0, 10.0, 0])
+    got = ps.refresh("T")
+    assert got["Close"].tolist() == [10.0] * 5
+    assert y.calls[-1] is None
+
+def test_new_dividend_triggers_full_redownload(tmp_path):
+    y = FakeYahoo(bars([100.0, 100.0, 100.0]))
+    ps = PriceStore(str(tmp_path), y)
+    ps.refresh("T")
+    # 배당락 당일의 새 봉만 배당이 있고, 겹치는 봉 종가는 거의 그대로인 경우
+    y.history = bars([99.99999, 99.99999, 99.99999, 98.0], div=[0, 0, 0, 2.0])
+    ps.refresh("T")
+    assert y.calls[-1] is None
+    # 이미 반영된 배당은 다시 전체를 받게 하지 않음
+    y.history = bars([99.99999, 99.99999, 99.99999, 98.0, 98.5], div=[0, 0, 0, 2.0, 0])
+    ps.refresh("T")
+    assert y.calls[-1] is not None
+
+def test_load_uses_fresh_cache_and_falls_back_on_error(tmp_path):
+    y = FakeYahoo(bars([1.0, 2.0]))
+    ps = PriceStore(str(tmp_path), y)
+    assert ps.load("T")["Close"].tolist() == [1.0, 2.0]
+    ps.load("T")
+    assert len(y.calls) == 1
+
+    def boom(t, start): raise OSError("offline")
+    stale = PriceStore(str(tmp_path), boom, refresh_interval=0)
+    assert stale.load("T")["Close"].tolist() == [1.0, 2.0]
+
+def test_concurrent_loads_download_once(tmp_path):
+    gate = threading.Event()
+    y = FakeYahoo(bars([1.0, 2.0]))
+    def slow(t, start):
+        gate.wait(1); return y(t, start)
+    ps = PriceStore(str(tmp_path), slow)
+    th = [threading.Thread(target=ps.load, args=("T",)) for _ in range(4)]
+    for x in th: x.start()
+    gate.set()
+    for x in th: x.join()
+    assert len(y.calls) == 1
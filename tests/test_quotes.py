@@ -0,0 +1,78 @@
+import time
+import threading
+from types import SimpleNamespace
+import quotes
+from quotes import QuoteService
+
+class FakeFetch:
+    def __init__(self, prices, gate=None, fail=False):
+        self.prices = prices
+        self.gate = gate
+        self.fail = fail
+        self.calls = []
+
+    def __call__(self, ts):
+        self.calls.append(list(ts))
+        if self.gate is not None: self.gate.wait(5)
+        if self.fail: raise OSError("yahoo down")
+        return {t: self.prices[t] for t in ts if t in self.prices}
+
+def test_batches_and_dedups_tickers():
+    f = FakeFetch({"AAPL": 200.0, "QQQ": 500.0})
+    qs = QuoteService(f)
+    assert qs.get(["AAPL", "QQQ", "AAPL", "", None]) == {"AAPL": 200.0, "QQQ": 500.0}
+    assert f.calls == [["AAPL", "QQQ"]]
+    # 캐시된 종목은 빼고 새 종목만 요청
+    f.prices["SPY"] = 600.0
+    assert qs.get(["QQQ", "SPY"]) == {"QQQ": 500.0, "SPY": 600.0}
+    assert f.calls == [["AAPL", "QQQ"], ["SPY"]]
+
+def test_concurrent_callers_share_one_fetch():
+    gate = threading.Event()
+    f = FakeFetch({"AAPL": 200.0, "QQQ": 500.0}, gate=gate)
+    qs = QuoteService(f)
+    out = [None] * 5
+    def work(i): out[i] = qs.get(["AAPL", "QQQ"] if i % 2 else ["QQQ"])
+    th = [threading.Thread(target=work, args=(i,)) for i in range(5)]
+    for t in th: t.start()
+    time.sleep(0.2); gate.set()
+    for t in th: t.join(5)
+    # 종목마다 정확히 한 번만 조회 (먼저 온 호출이 가져간 종목은 나머지가 기다림)
+    assert sorted(t for c in f.calls for t in c) == ["AAPL", "QQQ"]
+    assert out == [{"QQQ": 500.0} if i % 2 == 0 else {"AAPL": 200.0, "QQQ": 500.0} for i in range(5)]
+
+def test_ttl(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(quotes, "time", SimpleNamespace(time=lambda: now[0]))
+    f = FakeFetch({"AAPL": 200.0})
+    qs = QuoteService(f, ttl=60)
+    qs.get(["AAPL"])
+    now[0] += 59; f.prices["AAPL"] = 210.0
+    assert qs.get(["AAPL"]) == {"AAPL": 200.0}
+    now[0] += 2
+    assert qs.get(["AAPL"]) == {"AAPL": 210.0}
+    assert len(f.calls) == 2
+
+def test_failures_are_not_cached():
+    gate = threading.Event()
+    f = FakeFetch({"AAPL": 200.0}, gate=gate, fail=True)
+    qs = QuoteService(f)
+    out = [None] * 3
+    def work(i): out[i] = qs.get(["AAPL"])
+    th = [threading.Thread(target=work, args=(i,)) for i in range(3)]
+    for t in th: t.start()
+    time.sleep(0.2); gate.set()
+    for t in th: t.join(5)
+    # 실패는 기다리던 호출자 모두에게 빈 결과로 전달
+    assert out == [{}] * 3 and len(f.calls) == 1
+    f.fail = False
+    assert qs.get(["AAPL"]) == {"AAPL": 200.0}
+    assert len(f.calls) == 2
+
+def test_missing_ticker_drops_out_of_result():
+    f = FakeFetch({"AAPL": 200.0})
+    qs = QuoteService(f)
+    assert qs.get(["AAPL", "NOPE"]) == {"AAPL": 200.0}
+    # 없는 종목도 TTL 동안은 다시 요청하지 않음
+    assert qs.get(["NOPE"]) == {}
+    assert f.calls == [["AAPL", "NOPE"]]
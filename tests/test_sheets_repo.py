@@ -0,0 +1,78 @@
+import time
+from fake_gspread import FakeSpreadsheet
+from sheets_repo import SheetRepo, USER_SHEET, TRADE_SHEET, USER_HEADER, TRADE_HEADER
+
+def make_repo(ttl=60):
+    ss = FakeSpreadsheet()
+    return ss, SheetRepo(lambda: ss, ttl=ttl)
+
+def test_upsert_on_empty_sheet_writes_header_once():
+    ss, repo = make_repo()
+    repo.upsert_user("a@x", "에이", "김", 1000)
+    repo.upsert_user("b@x", "비", "이", 2000)
+    ws = ss.sheets[USER_SHEET]
+    assert ws.values == [USER_HEADER, ["a@x", "에이", "김", 1000], ["b@x", "비", "이", 2000]]
+    assert ws.calls.count("get_all_values") == 1
+    assert repo.get_user("b@x") == {"email": "b@x", "nickname": "비", "name": "이", "default_budget": 2000}
+    assert repo.get_user("none@x") is None
+
+def test_update_existing_user_is_one_batch_update():
+    ss, repo = make_repo()
+    ss.add_worksheet(USER_SHEET, 100, 10).values = [USER_HEADER, ["a@x", "n", "", "1"], ["b@x", "m", "", "2"]]
+    repo.upsert_user("b@x", "새이름", "박", 5000)
+    ws = ss.sheets[USER_SHEET]
+    assert ws.calls == ["get_all_values", "batch_update"]
+    assert ws.values[2] == ["b@x", "새이름", "박", 5000]
+    assert repo.get_user("b@x")["nickname"] == "새이름"
+
+def test_index_maps_email_to_rows():
+    ss, repo = make_repo()
+    ss.add_worksheet(TRADE_SHEET, 100, 10).values = [TRADE_HEADER, ["a@x", "QQQ", "2024-01-02", "100", "1"],
+                                                     ["b@x", "SPY", "2024-01-02", "200", "2"], ["a@x", "SPY", "2024-01-03", "1,000", "3"]]
+    _, header, rows = repo.trade_rows("a@x")
+    assert header == TRADE_HEADER
+    assert [r for r, _ in rows] == [2, 4]
+    assert repo.trade_rows("none@x")[2] == []
+
+def test_ttl_and_invalidate_reload():
+    ss, repo = make_repo(ttl=0.05)
+    ws = ss.add_worksheet(USER_SHEET, 100, 10)
+    ws.values = [USER_HEADER, ["a@x", "n", "", "1"]]
+    repo.get_user("a@x"); repo.get_user("a@x")
+    assert ws.calls.count("get_all_values") == 1
+    time.sleep(0.06)
+    ws.values.append(["b@x", "m", "", "2"])
+    assert repo.get_user("b@x")["nickname"] == "m"
+    assert ws.calls.count("get_all_values") == 2
+
+    repo.ttl = 60
+    ws.values[1][1] = "바뀜"
+    assert repo.get_user("a@x")["nickname"] == "n"
+    repo.invalidate(USER_SHEET)
+    assert repo.get_user("a@x")["nickname"] == "바뀜"
+    assert ws.calls.count("get_all_values") == 3
+
+def test_add_trades_keeps_index_in_sync():
+    ss, repo = make_repo()
+    repo.add_trades([["a@x", "QQQ", "2024-01-02", 100.0, 1], ["b@x", "SPY", "2024-01-02", 200.0, 2]])
+    repo.add_trades([["a@x", "SPY", "2024-01-03", 300.0, 3]])
+    ws = ss.sheets[TRADE_SHEET]
+    assert ws.values[0] == TRADE_HEADER
+    assert ws.calls.count("get_all_values") == 1
+    assert ws.calls.count("append_rows") == 2
+    v, _, rows = repo.trade_rows("a@x")
+    assert [r for r, _ in rows] == [2, 4]
+    # 새로 읽어도 인덱스가 같은 시트 행을 가리킴
+    repo.invalidate()
+    v2, _, reloaded = repo.trade_rows("a@x")
+    assert v2 == v + 1
+    assert [r for r, _ in reloaded] == [2, 4]
+
+def test_legacy_trade_header_gets_trade_id_column():
+    ss, repo = make_repo()
+    ws = ss.add_worksheet(TRADE_SHEET, 100, 10)
+    ws.values = [TRADE_HEADER[:-1], ["a@x", "QQQ", "2024-01-02", "100", "1"]]
+    repo.add_trades([["a@x", "SPY", "2024-01-03", 200.0, 2, "q-1"]])
+    assert ws.values[0] == TRADE_HEADER
+    assert repo.sent_trade_ids(["q-1", "q-2"], reload=True) == {"q-1"}
+    assert [r for r, _ in repo.trade_rows("a@x")[2]] == [2, 3]
@@ -0,0 +1,166 @@
+import itertools
+import numpy as np
+import pandas as pd
+import pytest
+from scipy import optimize
+import simulation
+from simulation import buy_schedule, _build_schedule, run_simulation, xirr, xirr_batch, xirr_solve, FX_FALLBACK
+
+# 예전 app.py 의 iterrows 루프 (고정 환율 uk) 를 그대로 옮긴 기준 구현
+def reference(raw, yrs, intv, target_day, target_date, mb, div, is_us, uk=FX_FALLBACK):
+    df = raw[raw.index >= (raw.index.max() - pd.DateOffset(years=yrs))].copy()
+
+    bi = []
+    if intv == "매일": bi = df.index
+    elif intv == "매월":
+        grouped = df.groupby([df.index.year, df.index.month])
+        for _, g in grouped:
+            candidates = g[g.index.day >= target_date]
+            if not candidates.empty: bi.append(candidates.index[0])
+            else: bi.append(g.index[-1])
+    elif intv == "매주":
+        d_map = {"월요일":0, "화요일":1, "수요일":2, "목요일":3, "금요일":4}
+        bi = df[df.index.dayofweek == d_map[target_day]].index
+
+    pt_krw = mb
+    if intv == "매주": pt_krw = mb * 12 / 52
+    elif intv == "매일": pt_krw = mb * 12 / 250
+
+    pt_amt = pt_krw / uk if is_us else pt_krw
+    shares = 0; inv_curr = 0; inf_p = 0
+    hist = []; prev = df.index[0]
+
+    for d, r in df.iterrows():
+        p = r['Close']
+        days = (d - prev).days
+        if inf_p > 0: inf_p *= (1.02) ** (days/365)
+        prev = d
+
+        if div and r.get('Dividends', 0) > 0: shares += (r['Dividends']*shares)/p
+
+        if d in bi:
+            shares += pt_amt/p
+            inv_curr += pt_amt
+            inf_p += pt_amt * (uk if is_us else 1)
+
+        rate = uk if is_us else 1
+        hist.append({"date": d, "invested": inv_curr*rate, "total_value": shares*p*rate, "inflation_principal": inf_p})
+
+    res_df = pd.DataFrame(hist)
+    fin_val = res_df['total_value'].iloc[-1]
+    x_dates = list(bi) + [res_df['date'].iloc[-1]]
+    x_flows = [-pt_krw]*len(bi) + [fin_val]
+    def npv(r):
+        if r <= -1.0: return float('inf')
+        d0 = x_dates[0]; return sum([c / ((1 + r) ** ((dt - d0).days / 365.0)) for c, dt in zip(x_flows, x_dates)])
+    try: x = optimize.newton(npv, 0.1)
+    except (RuntimeError, OverflowError): x = None
+    return res_df, list(bi), x
+
+# 9월 중순에 끝나는 8년치 영업일 가격 (분기 배당 포함) -> 구간이 항상 월 중간에서 시작
+def prices(seed=0):
+    rng = np.random.default_rng(seed)
+    idx = pd.bdate_range(end="2026-09-16", periods=252 * 8)
+    close = 100 * np.exp(np.cumsum(rng.normal(0.0003, 0.012, len(idx))))
+    divs = np.where((idx.month % 3 == 0) & (idx.day >= 10) & (idx.day <= 12) & (idx.dayofweek == 2), 0.8, 0.0)
+    return pd.DataFrame({"Close": close, "Dividends": divs}, index=idx)
+
+RAW = prices()
+SCHEDULES = [("매일", "금요일", 1), ("매주", "월요일", 1), ("매주", "금요일", 1), ("매월", "금요일", 1), ("매월", "금요일", 15), ("매월", "금요일", 30)]
+
+@pytest.mark.parametrize("sched,yrs,div", list(itertools.product(SCHEDULES, [1, 3, 7], [True, False])))
+def test_matches_baseline_loop(sched, yrs, div):
+    intv, day, date = sched
+    p = {"iq": "x", "it": "005930.KS", "mb": 1000000, "intv": intv, "target_day": day, "target_date": date, "yrs": yrs, "div": div}
+    res = run_simulation(p, [RAW])
+    exp, bi, x = reference(RAW, yrs, intv, day, date, 1000000, div, is_us=False)
+
+    got = res['df']
+    assert list(got['date']) == list(exp['date'])
+    assert list(got['date'][res['mask']]) == bi
+    for c in ("invested", "total_value", "inflation_principal"):
+        assert np.allclose(got[c], exp[c], rtol=1e-9, atol=1e-6), c
+    assert x is not None and res['xv'] == pytest.approx(x * 100, rel=1e-6)
+
+def test_us_ticker_with_fixed_fx_matches_baseline_loop():
+    p = {"iq": "x", "it": "QQQ", "mb": 500000, "intv": "매주", "target_day": "수요일", "target_date": 1, "yrs": 3, "div": True}
+    res = run_simulation(p, [RAW])
+    exp, _, x = reference(RAW, 3, "매주", "수요일", 1, 500000, True, is_us=True)
+    for c in ("invested", "total_value", "inflation_principal"):
+        assert np.allclose(res['df'][c], exp[c], rtol=1e-9), c
+    assert res['xv'] == pytest.approx(x * 100, rel=1e-6)
+
+def test_monthly_schedule_february_and_mid_month_start():
+    # 2024-02-20 (화) 에서 시작: 첫 달은 구간 첫날 이후에서 고름, 2월 30일은 2월 마지막 거래일
+    idx = pd.bdate_range("2024-02-20", "2024-05-10")
+    days = lambda target: [str(d.date()) for d in idx[_build_schedule(idx, "매월", target)]]
+    assert days(1) == ["2024-02-20", "2024-03-01", "2024-04-01", "2024-05-01"]
+    assert days(15) == ["2024-02-20", "2024-03-15", "2024-04-15", "2024-05-10"]
+    assert days(30) == ["2024-02-29", "2024-03-29", "2024-04-30", "2024-05-10"]
+
+    # 평년 2월, 30일이 주말인 달
+    idx = pd.bdate_range("2025-02-01", "2025-08-31")
+    assert [str(d.date()) for d in idx[_build_schedule(idx, "매월", 30)]] == \
+        ["2025-02-28", "2025-03-31", "2025-04-30", "2025-05-30", "2025-06-30", "2025-07-30", "2025-08-29"]
+
+def test_buy_schedule_is_cached_per_index_and_read_only():
+    idx = RAW.index[-300:]
+    a = buy_schedule(idx, "매월", "금요일", 15)
+    assert buy_schedule(pd.DatetimeIndex(list(idx)), "매월", "월요일", 15) is a
+    assert buy_schedule(idx, "매월", "금요일", 1) is not a
+    assert not a.flags.writeable
+
+# ----- XIRR -----
+
+def scalar_xirr(cf, t):
+    return optimize.brentq(lambda r: sum(c * (1 + r) ** -x for c, x in zip(cf, t)), -0.999, 10)
+
+def count_brent(monkeypatch):
+    calls = []
+    real = simulation._xirr_brent
+    monkeypatch.setattr(simulation, "_xirr_brent", lambda cf, t: calls.append(len(cf)) or real(cf, t))
+    return calls
+
+def dca_flows(n=36, final=40e6):
+    d = pd.date_range("2023-01-02", periods=n, freq="MS")
+    return [-1e6] * n + [final], list(d) + [pd.Timestamp("2026-01-15")]
+
+def test_xirr_newton_matches_brentq(monkeypatch):
+    calls = count_brent(monkeypatch)
+    cf, d = dca_flows()
+    t = ((pd.DatetimeIndex(d) - d[0]).days / 365.0).to_numpy()
+    assert xirr(cf, d) == pytest.approx(scalar_xirr(cf, t), abs=1e-9)
+    assert calls == []
+
+def test_xirr_falls_back_to_brent(monkeypatch):
+    calls = count_brent(monkeypatch)
+    cf, t = [-100.0, -100.0, 1.0], np.array([0.0, 1.0, 2.0])
+    r = xirr_solve([cf], t)[0]
+    assert calls == [3]
+    assert r == pytest.approx(scalar_xirr(cf, t), abs=1e-9)
+
+def test_xirr_unsolvable_is_nan_and_none():
+    d = pd.date_range("2024-01-01", periods=4, freq="MS")
+    assert np.isnan(xirr_batch([[-1.0, -1.0, -1.0, -1.0]], d)[0])
+    assert xirr([-1.0, -1.0, -1.0, -1.0], list(d)) is None
+    assert xirr([-1.0], list(d[:1])) is None and xirr([-1.0, 2.0], list(d)) is None
+
+def test_xirr_batch_rows_match_single_calls():
+    rng = np.random.default_rng(3)
+    d = pd.date_range("2022-01-03", periods=25, freq="MS")
+    cfs = np.where(rng.random((6, 25)) < 0.7, -1e6, 0.0)
+    cfs[:, -1] = rng.uniform(5e6, 40e6, 6)
+    cfs[0] = 0.0; cfs[0, [0, -1]] = [-1.0, -2.0]   # 해가 없는 행
+    got = xirr_batch(cfs, d)
+    assert np.isnan(got[0])
+    for row, r in zip(cfs[1:], got[1:]):
+        assert r == pytest.approx(xirr(list(row), list(d)), abs=1e-12)
+
+def test_xirr_solve_per_row_times():
+    # rolling_backtest 처럼 행마다 다른 시간 축 (S, N)
+    cfs = np.array([[-1.0, -1.0, 2.5], [-1.0, -1.0, 1.8], [-1.0, 0.0, 1.1]])
+    t = np.array([[0.0, 0.5, 1.0], [0.0, 1.0, 3.0], [0.0, 0.0, 0.25]])
+    got = xirr_solve(cfs, t)
+    for i in range(3):
+        assert got[i] == pytest.approx(scalar_xirr(cfs[i], t[i]), abs=1e-9)
+        assert got[i] == pytest.approx(xirr_solve(cfs[i], t[i])[0], abs=1e-12)
@@ -0,0 +1,90 @@
+import threading
+import pytest
+import trade_queue
+from fake_gspread import FakeSpreadsheet
+from sheets_repo import SheetRepo, TRADE_SHEET, TRADE_HEADER
+from trade_queue import TradeQueue
+
+def make_queue(tmp_path, **kw):
+    ss = FakeSpreadsheet()
+    repo = SheetRepo(lambda: ss, ttl=60)
+    q = TradeQueue(repo.add_trades, lambda ids: repo.sent_trade_ids(ids, reload=True), path=str(tmp_path / "q.db"), **kw)
+    return ss, repo, q
+
+def sheet_rows(ss):
+    return ss.sheets[TRADE_SHEET].values[1:]
+
+def test_rows_are_deleted_only_after_flush_succeeds(tmp_path):
+    ss, repo, q = make_queue(tmp_path)
+    q.enqueue("a@x", "QQQ", "2024-01-02", 100, 1)
+    q.enqueue("b@x", "SPY", "2024-01-03", 200.5, 2)
+    assert list(q.pending_df("a@x")["trade_id"]) == [q.trade_id(1)]
+
+    sent = []
+    def fail(rows): sent.append(rows); raise OSError("offline")
+    q.flush = fail
+    with pytest.raises(OSError): q.flush_once()
+    assert len(q.pending()) == 2
+
+    q.flush = repo.add_trades
+    assert q.flush_once() == 2 and q.pending() == []
+    assert ss.sheets[TRADE_SHEET].values[0] == TRADE_HEADER
+    assert [r[-1] for r in sheet_rows(ss)] == [q.trade_id(1), q.trade_id(2)]
+    assert sent[0] == [["a@x", "QQQ", "2024-01-02", 100.0, 1, q.trade_id(1)], ["b@x", "SPY", "2024-01-03", 200.5, 2, q.trade_id(2)]]
+
+def test_install_id_persists_and_ids_differ_per_install(tmp_path):
+    q1 = TradeQueue(lambda rows: None, path=str(tmp_path / "a.db"))
+    q2 = TradeQueue(lambda rows: None, path=str(tmp_path / "a.db"))
+    q3 = TradeQueue(lambda rows: None, path=str(tmp_path / "b.db"))
+    assert q1.install_id == q2.install_id != q3.install_id
+
+def test_ambiguous_append_is_not_sent_twice(tmp_path):
+    ss, repo, q = make_queue(tmp_path)
+    q.flush_once()
+    q.enqueue("a@x", "QQQ", "2024-01-02", 100, 1)
+    # 시트에는 기록됐지만 응답이 시간 초과로 끝난 경우
+    def timeout(rows): repo.add_trades(rows); raise TimeoutError("read timeout")
+    q.flush = timeout
+    with pytest.raises(TimeoutError): q.flush_once()
+    q.enqueue("a@x", "SPY", "2024-01-03", 200, 1)
+
+    calls = []
+    q.flush = lambda rows: (calls.append(rows), repo.add_trades(rows))
+    assert q.flush_once() == 2 and q.pending() == []
+    assert [r[-1] for r in calls[0]] == [q.trade_id(2)]
+    assert [r[-1] for r in sheet_rows(ss)] == [q.trade_id(1), q.trade_id(2)]
+
+def test_failed_delete_is_not_sent_twice(tmp_path, monkeypatch):
+    ss, repo, q = make_queue(tmp_path)
+    q.enqueue("a@x", "QQQ", "2024-01-02", 100, 1)
+    real = q._delete
+    def locked(ids): raise trade_queue.sqlite3.OperationalError("database is locked")
+    monkeypatch.setattr(q, "_delete", locked)
+    with pytest.raises(trade_queue.sqlite3.OperationalError): q.flush_once()
+    assert len(sheet_rows(ss)) == 1 and len(q.pending()) == 1
+
+    monkeypatch.setattr(q, "_delete", real)
+    assert q.flush_once() == 1 and q.pending() == []
+    assert len(sheet_rows(ss)) == 1
+
+def test_backoff_is_capped_and_jittered(tmp_path):
+    q = TradeQueue(lambda rows: None, path=str(tmp_path / "q.db"), interval=1.0, max_backoff=8.0)
+    for failures, cap in [(0, 1.0), (1, 2.0), (2, 4.0), (3, 8.0), (10, 8.0)]:
+        q.failures = failures
+        waits = [q._backoff() for _ in range(50)]
+        assert all(cap * 0.5 <= w <= cap for w in waits)
+
+def test_background_thread_retries_until_flush_succeeds(tmp_path):
+    done = threading.Event()
+    calls = []
+    def flaky(rows):
+        calls.append(rows)
+        if len(calls) < 3: raise OSError("503")
+        done.set()
+    q = TradeQueue(flaky, path=str(tmp_path / "q.db"), interval=0.01, max_backoff=0.02)
+    q.enqueue("a@x", "QQQ", "2024-01-02", 100, 1)
+    q.start()
+    assert done.wait(5)
+    q.stop(5)
+    assert len(calls) == 3 and calls[0] == calls[2]
+    assert q.pending() == [] and q.failures == 0 and q.last_error is None
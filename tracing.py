@@ -0,0 +1,203 @@
+import os
+import json
+import time
+import logging
+import itertools
+import functools
+import threading
+from collections import deque, defaultdict
+from contextlib import contextmanager
+
+# ---------------------------------------------------------
+# 가벼운 성능 추적 (실행(rerun)별 중첩 구간 시간 + 캐시 적중/실패 횟수)
+# - 꺼져 있으면 span/cached/traced 는 함수 호출 하나 수준의 비용만 추가
+# - 실행 기록은 JSON lines, 누적 값은 Prometheus 텍스트 형식으로 내보냄
+# ---------------------------------------------------------
+
+log = logging.getLogger(__name__)
+_ids = itertools.count(1)
+
+class Span:
+    __slots__ = ("name", "attrs", "ms", "error", "children")
+
+    def __init__(self, name, attrs):
+        self.name = name
+        self.attrs = attrs
+        self.ms = None
+        self.error = None
+        self.children = []
+
+    def to_dict(self):
+        d = {"name": self.name, "ms": round(self.ms or 0.0, 3)}
+        if self.attrs: d["attrs"] = self.attrs
+        if self.error: d["error"] = self.error
+        if self.children: d["children"] = [c.to_dict() for c in self.children]
+        return d
+
+# 한 번의 스크립트 실행(또는 백그라운드 작업)에서 기록된 구간과 카운터
+class Trace:
+    def __init__(self, name):
+        self.id = next(_ids)
+        self.name = name
+        self.started_at = time.time()
+        self.ms = None
+        self.spans = []
+        self.counters = defaultdict(int)   # (종류, 이름[, 결과]) -> 횟수
+
+    def to_dict(self):
+        return {"id": self.id, "name": self.name, "started_at": self.started_at, "ms": round(self.ms or 0.0, 3),
+                "spans": [s.to_dict() for s in self.spans],
+                "counters": {":".join(k): v for k, v in self.counters.items()}}
+
+class _Noop:
+    def __enter__(self): return None
+    def __exit__(self, *exc): return False
+
+_NOOP = _Noop()
+
+class Tracer:
+    def __init__(self, enabled=False, keep=50):
+        self.enabled = enabled
+        self.history = deque(maxlen=keep)        # 끝난 Trace (최근 keep 개)
+        self.span_totals = defaultdict(lambda: [0, 0.0, 0])   # 구간 이름 -> [횟수, 누적 초, 오류 수]
+        self.counters = defaultdict(int)         # 프로세스 누적 카운터
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def _state(self):
+        st = self._local
+        if not hasattr(st, "stack"):
+            st.trace = None; st.stack = []; st.probes = []
+        return st
+
+    # 스크립트 실행/작업 하나를 Trace 로 묶음 (끝나면 history 에 추가)
+    @contextmanager
+    def trace(self, name):
+        if not self.enabled:
+            yield None; return
+        st = self._state()
+        prev, prev_stack = st.trace, st.stack
+        tr = st.trace = Trace(name); st.stack = []
+        t0 = time.perf_counter()
+        try:
+            yield tr
+        finally:
+            tr.ms = (time.perf_counter() - t0) * 1000
+            st.trace, st.stack = prev, prev_stack
+            with self._lock: self.history.append(tr)
+
+    def span(self, name, **attrs):
+        if not self.enabled: return _NOOP
+        return self._span(name, attrs)
+
+    # 진행 중인 Trace 가 없으면(예: 작업 스레드) 누적 값에만 반영
+    @contextmanager
+    def _span(self, name, attrs):
+        st = self._state()
+        sp = Span(name, attrs)
+        if st.stack: st.stack[-1].children.append(sp)
+        elif st.trace is not None: st.trace.spans.append(sp)
+        st.stack.append(sp)
+        t0 = time.perf_counter()
+        try:
+            yield sp
+        except Exception as e:
+            sp.error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            sp.ms = (time.perf_counter() - t0) * 1000
+            st.stack.pop()
+            with self._lock:
+                tot = self.span_totals[name]
+                tot[0] += 1; tot[1] += sp.ms / 1000; tot[2] += sp.error is not None
+
+    def traced(self, name):
+        def deco(fn):
+            @functools.wraps(fn)
+            def wrapper(*args, **kw):
+                if not self.enabled: return fn(*args, **kw)
+                with self._span(name, {}): return fn(*args, **kw)
+            return wrapper
+        return deco
+
+    # 캐시로 감싼 함수의 적중/미스 기록: 실제 계산 경로에서 miss() 를 호출
+    def cached(self, name):
+        def deco(fn):
+            @functools.wraps(fn)
+            def wrapper(*args, **kw):
+                if not self.enabled: return fn(*args, **kw)
+                st = self._state()
+                st.probes.append(False)
+                try:
+                    with self._span(name, {}) as sp:
+                        out = fn(*args, **kw)
+                        sp.attrs["cache"] = "miss" if st.probes[-1] else "hit"
+                        return out
+                finally:
+                    self.count("cache", name, "miss" if st.probes.pop() else "hit")
+            return wrapper
+        return deco
+
+    def miss(self):
+        if not self.enabled: return
+        st = self._state()
+        if st.probes: st.probes[-1] = True
+
+    def count(self, *key, n=1):
+        with self._lock: self.counters[key] += n
+        tr = self._state().trace
+        if tr is not None: tr.counters[key] += n
+
+    # 삼킨 예외는 기록만 하고 넘어감 (추적이 꺼져 있어도 로그와 누적 횟수는 남김)
+    def fail(self, name, exc):
+        log.warning("%s failed: %s: %s", name, type(exc).__name__, exc)
+        self.count("fail", name)
+
+    def reset(self):
+        with self._lock:
+            self.history.clear(); self.span_totals.clear(); self.counters.clear()
+
+    # ----- 내보내기 -----
+    def to_jsonl(self):
+        with self._lock: traces = list(self.history)
+        return "".join(json.dumps(t.to_dict(), ensure_ascii=False) + "\n" for t in traces)
+
+    def to_prometheus(self, prefix="dca"):
+        with self._lock:
+            spans = {k: list(v) for k, v in self.span_totals.items()}
+            counters = dict(self.counters)
+        lines = [f"# HELP {prefix}_span_seconds Time spent in traced spans.",
+                 f"# TYPE {prefix}_span_seconds summary"]
+        for name, (n, sec, _) in sorted(spans.items()):
+            lines.append(f'{prefix}_span_seconds_count{{span="{_esc(name)}"}} {n}')
+            lines.append(f'{prefix}_span_seconds_sum{{span="{_esc(name)}"}} {sec:.6f}')
+        lines += [f"# HELP {prefix}_span_errors_total Spans that ended with an exception.",
+                  f"# TYPE {prefix}_span_errors_total counter"]
+        for name, (_, _, err) in sorted(spans.items()):
+            lines.append(f'{prefix}_span_errors_total{{span="{_esc(name)}"}} {err}')
+        lines += [f"# HELP {prefix}_cache_requests_total Cache lookups by result.",
+                  f"# TYPE {prefix}_cache_requests_total counter"]
+        for k, v in sorted(counters.items()):
+            if k[0] == "cache": lines.append(f'{prefix}_cache_requests_total{{cache="{_esc(k[1])}",result="{k[2]}"}} {v}')
+        lines += [f"# HELP {prefix}_failures_total Swallowed failures by operation.",
+                  f"# TYPE {prefix}_failures_total counter"]
+        for k, v in sorted(counters.items()):
+            if k[0] == "fail": lines.append(f'{prefix}_failures_total{{op="{_esc(k[1])}"}} {v}')
+        return "\n".join(lines) + "\n"
+
+def _esc(s):
+    return str(s).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+# 구간 트리를 들여쓴 텍스트로 (관리자 패널 표시용)
+def format_trace(tr):
+    out = [f"#{tr.id} {tr.name}  {tr.ms or 0:,.1f} ms"]
+    def walk(spans, depth):
+        for s in spans:
+            extra = " ".join(f"{k}={v}" for k, v in s.attrs.items())
+            out.append(f"{'  ' * depth}{s.name}  {s.ms or 0:,.1f} ms{'  ' + extra if extra else ''}{'  !' + s.error if s.error else ''}")
+            walk(s.children, depth + 1)
+    walk(tr.spans, 1)
+    return "\n".join(out)
+
+# 프로세스 공용 추적기 (APP_TRACE=1 이면 시작부터 켜짐)
+tracer = Tracer(enabled=os.environ.get("APP_TRACE", "") == "1")
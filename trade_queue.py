@@ -0,0 +1,120 @@
+import os
+import time
+import uuid
+import random
+import sqlite3
+import logging
+import threading
+from contextlib import closing
+import pandas as pd
+
+# ---------------------------------------------------------
+# 거래 입력 쓰기 지연 큐 (SQLite 저널 + 백그라운드 일괄 전송)
+# ---------------------------------------------------------
+
+QUEUE_PATH = os.environ.get("TRADE_QUEUE_PATH", ".trade_queue.db")
+COLUMNS = ["user_email", "ticker", "date", "price", "quantity", "trade_id"]
+
+log = logging.getLogger(__name__)
+
+class TradeQueue:
+    # flush(rows) 는 [[user_email, ticker, date, price, quantity, trade_id], ...] 를 한 번에 시트에 기록
+    # sent(trade_ids) 는 그중 이미 시트에 있는 trade_id 집합 (전송 실패 뒤 재전송 전에 확인)
+    def __init__(self, flush, sent=None, path=QUEUE_PATH, batch_size=100, interval=2.0, max_backoff=60.0):
+        self.flush = flush
+        self.sent = sent
+        self.path = path
+        self.batch_size = batch_size
+        self.interval = interval
+        self.max_backoff = max_backoff
+        self.failures = 0
+        self.last_error = None
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+        # 이전 프로세스가 전송 도중 끝났을 수 있으므로 첫 배치도 시트를 확인한 뒤 전송
+        self._unsure = True
+        with closing(self._connect()) as c, c:
+            c.execute("""CREATE TABLE IF NOT EXISTS pending (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                user_email TEXT, ticker TEXT, date TEXT, price REAL, quantity INTEGER,
+                created_at REAL)""")
+            c.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+            c.execute("INSERT OR IGNORE INTO meta VALUES ('install_id', ?)", (uuid.uuid4().hex[:12],))
+            self.install_id = c.execute("SELECT value FROM meta WHERE key = 'install_id'").fetchone()[0]
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=10)
+
+    # 저널에 즉시 기록하고 전송 스레드를 깨움
+    def enqueue(self, email, t, d, p, q):
+        with closing(self._connect()) as c, c:
+            c.execute("INSERT INTO pending (user_email, ticker, date, price, quantity, created_at) VALUES (?, ?, ?, ?, ?, ?)",
+                      (email, t, str(d), float(p), int(q), time.time()))
+        self._wake.set()
+
+    def pending(self, email=None, limit=None):
+        sql = "SELECT id, user_email, ticker, date, price, quantity FROM pending"
+        args = []
+        if email is not None: sql += " WHERE user_email = ?"; args.append(email)
+        sql += " ORDER BY id"
+        if limit is not None: sql += " LIMIT ?"; args.append(limit)
+        with closing(self._connect()) as c:
+            return c.execute(sql, args).fetchall()
+
+    # 저널 id (AUTOINCREMENT, 재사용되지 않음) + 설치별 id 로 만든 멱등 키
+    def trade_id(self, row_id):
+        return f"{self.install_id}-{row_id}"
+
+    def pending_df(self, email):
+        return pd.DataFrame([list(r[1:]) + [self.trade_id(r[0])] for r in self.pending(email)], columns=COLUMNS)
+
+    def _delete(self, row_ids):
+        with closing(self._connect()) as c, c:
+            c.executemany("DELETE FROM pending WHERE id = ?", [(i,) for i in row_ids])
+
+    # 한 배치를 전송하고 성공한 행만 저널에서 삭제 (실패 시 예외 그대로 전달)
+    # 전송이나 삭제가 실패하면 시트에 이미 기록되었을 수 있으므로 다음 배치는 sent() 로 확인한 행을 빼고 전송
+    def flush_once(self):
+        rows = self.pending(limit=self.batch_size)
+        if not rows: return 0
+        batch = [list(r[1:]) + [self.trade_id(r[0])] for r in rows]
+        try:
+            if self._unsure and self.sent is not None:
+                done = self.sent([b[-1] for b in batch])
+                batch = [b for b in batch if b[-1] not in done]
+            if batch: self.flush(batch)
+            self._delete([r[0] for r in rows])
+        except Exception:
+            self._unsure = True
+            raise
+        self._unsure = False
+        return len(rows)
+
+    def _backoff(self):
+        return min(self.max_backoff, self.interval * 2 ** self.failures) * random.uniform(0.5, 1.0)
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                n = self.flush_once()
+                self.failures = 0; self.last_error = None
+            except Exception as e:
+                self.failures += 1; self.last_error = e
+                log.warning("trade flush failed (%d): %s", self.failures, e)
+                # 실패 시에는 새 입력이 들어와도 백오프 시간만큼 대기
+                self._stop.wait(self._backoff()); continue
+            # 남은 행이 있으면 바로 다음 배치, 없으면 새 입력 또는 주기까지 대기
+            if n < self.batch_size:
+                self._wake.wait(self.interval); self._wake.clear()
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="trade-queue", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self, timeout=None):
+        self._stop.set(); self._wake.set()
+        if self._thread is not None: self._thread.join(timeout)